@@ -0,0 +1,278 @@
+"""
+Searches for very high-scoring boards that a set of cubes can really
+roll, by simulated annealing.
+
+A board is its cell codes (cube * 6 + face, as in boardio), so every
+board considered places each cube once with one of its own faces up.
+Each step either turns one cube to another face or swaps two cubes,
+and is re-scored with an IncrementalSolver, which only searches the
+paths through the one or two cells that changed.  Steps that lower the
+score are accepted with probability exp(delta / temperature), and the
+temperature falls geometrically over the time budget.
+
+Several chains run at once, one process each, from independent random
+streams.  They share the best board found so far: a chain publishes
+each new best, and every so often a chain that has fallen behind the
+shared best carries on from it.
+
+Usage:
+    python annealing.py [--seconds 60] [--chains N] [--seed S] [--cubes big]
+"""
+
+import argparse
+import math
+import os
+import queue
+import sys
+import time
+from multiprocessing import Array, Process, Queue, Value, get_start_method
+
+from bitsolver import IncrementalSolver
+from bogglecubes import CLASSIC, CUBE_SETS, FACES_PER_CUBE, faceTable, formatFaces
+from brandom import RandomStream, shuffled
+from lexicon import getLexicon
+
+class Annealer:
+    """An Annealer runs one annealing chain over the boards the cubes
+    can roll, starting from a random roll.
+
+    >>> annealer = Annealer(rng=RandomStream(3))
+    >>> start = annealer.getScore()
+    >>> annealer.run(steps=300) >= start
+    True
+    >>> score, codes = annealer.getBest()
+    >>> from boggleengine import scoreWords
+    >>> score == scoreWords(IncrementalSolver().solve(annealer.toFaces(codes)))
+    True
+    """
+
+    __slots__ = ['_cubes', '_table', '_solver', '_rng', '_codes',
+                 '_bestScore', '_bestCodes', '_steps']
+
+    def __init__(self, cubes=CLASSIC, rng=None):
+        """
+        Start a chain on a random roll of cubes (a tuple of cubes, eg
+        bogglecubes.BIG), drawing from rng (default: a fresh RandomStream).
+        """
+        size = math.isqrt(len(cubes))
+        self._cubes = cubes
+        self._table = faceTable(cubes)
+        self._solver = IncrementalSolver(size, len(cubes) // size)
+        self._rng = RandomStream() if rng is None else rng
+        self._steps = 0
+        self.load([cube * FACES_PER_CUBE + self._rng.randrange(FACES_PER_CUBE)
+                   for cube in shuffled(list(range(len(cubes))), self._rng)])
+
+    def load(self, codes):
+        """Carry on from the board with the given cell codes."""
+        self._codes = list(codes)
+        self._solver.load(self.toFaces(self._codes))
+        self._bestScore = self._solver.getScore()
+        self._bestCodes = bytes(self._codes)
+
+    def toFaces(self, codes):
+        """Returns the faces (list of str) of a board's cell codes."""
+        table = self._table
+        return [table[code] for code in codes]
+
+    def getCodes(self):
+        return bytes(self._codes)
+
+    def getScore(self):
+        """Returns the score of the current board."""
+        return self._solver.getScore()
+
+    def getBest(self):
+        """Returns (score, codes) of the best board this chain has seen."""
+        return (self._bestScore, self._bestCodes)
+
+    def getSteps(self):
+        """Returns the number of boards scored so far."""
+        return self._steps
+
+    def getWords(self):
+        """Returns the words on the current board (a set-like view)."""
+        return self._solver.getWords()
+
+    def step(self, temperature):
+        """
+        Try one random move at the given temperature.  Returns True if it
+        was kept.
+        """
+        rng = self._rng
+        codes = self._codes
+        solver = self._solver
+        table = self._table
+        cell = rng.randrange(len(codes))
+        if rng.random() < 0.5:
+            # turn the cube in cell to one of its other faces
+            code = codes[cell]
+            face = code % FACES_PER_CUBE
+            old = {cell: code}
+            new = {cell: code - face + (face + rng.randrange(1, FACES_PER_CUBE)) % FACES_PER_CUBE}
+        else:
+            # swap the cubes in two cells
+            other = rng.randrange(len(codes) - 1)
+            if other >= cell:
+                other += 1
+            old = {cell: codes[cell], other: codes[other]}
+            new = {cell: codes[other], other: codes[cell]}
+        before = solver.getScore()
+        solver.setFaces({c: table[code] for c, code in new.items()})
+        self._steps += 1
+        delta = solver.getScore() - before
+        if delta >= 0 or rng.random() < math.exp(delta / temperature):
+            for c, code in new.items():
+                codes[c] = code
+            if solver.getScore() > self._bestScore:
+                self._bestScore = solver.getScore()
+                self._bestCodes = bytes(codes)
+            return True
+        solver.setFaces({c: table[code] for c, code in old.items()})
+        return False
+
+    def run(self, seconds=None, steps=None, hot=20.0, cold=0.5, shared=None, syncEvery=1000):
+        """
+        Anneal for seconds (or for a number of steps, whichever comes
+        first), cooling from temperature hot to cold.  shared, if given,
+        is a (score Value, codes Array) pair holding the best board of all
+        chains, checked every syncEvery steps.  Returns the best score.
+        """
+        if seconds is None and steps is None:
+            raise ValueError("give a time budget or a number of steps")
+        start = time.perf_counter()
+        ratio = cold / hot
+        done = 0
+        while True:
+            progress = 0.0
+            if steps is not None:
+                progress = done / steps
+            if seconds is not None:
+                progress = max(progress, (time.perf_counter() - start) / seconds)
+            if progress >= 1:
+                break
+            self.step(hot * ratio ** progress)
+            done += 1
+            if shared is not None and done % syncEvery == 0:
+                self.__sync(*shared)
+        if shared is not None:
+            self.__sync(*shared)
+        return self._bestScore
+
+    def __sync(self, score, codes):
+        """Publish this chain's best, or take up the shared best if better."""
+        with score.get_lock():
+            if self._bestScore > score.value:
+                score.value = self._bestScore
+                codes[:] = self._bestCodes
+                return
+            if score.value <= self._bestScore:
+                return
+            best = bytes(codes[:])
+        self.load(best)
+
+
+def _chain(seed, chain, cubeSet, seconds, hot, cold, shared, results):
+    """
+    Process target: run chain number chain and report back on results,
+    with (chain, steps, score, codes), or (chain, exception) if it fails.
+    """
+    try:
+        # a no-op if inherited from search (fork); otherwise built here,
+        # before the time budget starts
+        getLexicon().getReversedPrefixes()
+        annealer = Annealer(CUBE_SETS[cubeSet], RandomStream(seed).jumped(chain))
+        annealer.run(seconds, hot=hot, cold=cold, shared=shared)
+    except Exception as e:
+        results.put((chain, e))
+        return
+    results.put((chain, annealer.getSteps()) + annealer.getBest())
+
+def search(seconds=10.0, chains=None, seed=0, cubeSet="classic", hot=20.0, cold=0.5):
+    """
+    Run chains annealing chains (default: one per core) in parallel for
+    seconds, on boards of the cube set named cubeSet.  Returns a dict of
+    the best score, its board (faces), its words and the number of
+    boards scored per second over all chains.  An exception raised in a
+    chain is raised here, and RuntimeError if a chain dies without
+    reporting back.
+
+    The lexicon's reversed prefixes are built here once and inherited by
+    the chains only under the fork start method; under spawn (the default
+    on Windows and macOS) each chain loads the lexicon and builds them
+    itself, which adds to its start-up time but not to the budget.
+
+    >>> result = search(0.5, chains=2, seed=1)
+    >>> result["score"] > 0, len(result["faces"])
+    (True, 16)
+    """
+    if cubeSet not in CUBE_SETS:
+        raise ValueError("unknown cube set {!r}".format(cubeSet))
+    chains = chains or os.cpu_count() or 1
+    cubes = CUBE_SETS[cubeSet]
+    if get_start_method() == "fork":
+        # build the reversed prefixes once, to be shared by the forked chains
+        getLexicon().getReversedPrefixes()
+    shared = (Value('i', -1), Array('B', len(cubes), lock=False))
+    results = Queue()
+    start = time.perf_counter()
+    processes = [Process(target=_chain, args=(seed, chain, cubeSet, seconds, hot, cold, shared, results))
+                 for chain in range(chains)]
+    for process in processes:
+        process.start()
+    finished = []
+    try:
+        while len(finished) < len(processes):
+            try:
+                result = results.get(timeout=1.0)
+            except queue.Empty:
+                # a chain that exits cleanly has already put its result,
+                # so one that failed to means it was killed or crashed
+                reported = {result[0] for result in finished}
+                for chain, process in enumerate(processes):
+                    if chain not in reported and process.exitcode not in (None, 0):
+                        raise RuntimeError("chain {} died with exit code {}".format(chain, process.exitcode))
+                continue
+            if len(result) == 2:
+                raise result[1]
+            finished.append(result)
+    finally:
+        for process in processes:
+            if process.is_alive() and len(finished) < len(processes):
+                process.terminate()
+            process.join()
+    elapsed = time.perf_counter() - start
+    _, _, score, codes = max(finished, key=lambda result: result[2])
+    faces = [faceTable(cubes)[code] for code in codes]
+    solver = IncrementalSolver(math.isqrt(len(cubes)), len(cubes) // math.isqrt(len(cubes)))
+    solver.load(faces)
+    return {"score": score, "faces": faces, "words": sorted(solver.getWords()),
+            "steps": sum(result[1] for result in finished), "seconds": elapsed,
+            "scoresPerSecond": sum(result[1] for result in finished) / elapsed}
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Search for high-scoring boards by simulated annealing.")
+    parser.add_argument("-t", "--seconds", type=float, default=60.0, help="time budget")
+    parser.add_argument("-j", "--chains", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("--cubes", choices=sorted(CUBE_SETS), default="classic")
+    parser.add_argument("--hot", type=float, default=20.0, help="starting temperature")
+    parser.add_argument("--cold", type=float, default=0.5, help="final temperature")
+    options = parser.parse_args(args)
+
+    result = search(options.seconds, options.chains, options.seed, options.cubes,
+                    options.hot, options.cold)
+    print("best score {} ({} words): {}".format(
+        result["score"], len(result["words"]), formatFaces(result["faces"])))
+    print(" ".join(result["words"]))
+    print("{} boards scored in {:.1f}s: {:.0f} scores/sec".format(
+        result["steps"], result["seconds"], result["scoresPerSecond"]), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main()
+    else:
+        from doctest import testmod
+        testmod()
@@ -0,0 +1,167 @@
+"""
+Solves the board in play on a background thread, so end-of-round
+figures (missed words, the best possible score, how much of the board
+was found) are ready by the time they are asked for.
+
+The solve runs on its own daemon thread and never touches Tk, so the
+event loop keeps handling clicks while it runs.  Submitting a new board
+cancels the solve of the old one: a solve that is still running stops
+at its next starting cell and its result is thrown away.  When only a
+few cells change (a cube re-rolled mid-round), the solved board is
+updated in place, searching only the paths through those cells.
+"""
+
+import threading
+
+from bitsolver import IncrementalSolver
+from boggleengine import scoreWords
+
+class BackgroundSolver:
+    """A BackgroundSolver solves one board at a time on a worker thread.
+    Each board submitted gets a new generation number; only the result
+    for the latest generation is kept.
+
+    >>> solver = BackgroundSolver(2, 2)
+    >>> solver.submit(["C", "A", "T", "S"])
+    >>> sorted(solver.getWords(timeout=5))
+    ['ACT', 'CAST', 'CAT', 'SAC', 'SAT', 'SCAT']
+    >>> solver.getMaxScore()
+    6
+    >>> solver.update({3: "R"})
+    >>> sorted(solver.getWords(timeout=5))
+    ['ACT', 'ARC', 'ART', 'CAR', 'CART', 'CAT', 'RAT', 'TAR']
+    >>> solver.submit(["Z", "Z", "Z", "Z"])
+    >>> solver.getWords(timeout=5)
+    frozenset()
+    >>> solver.close()
+    """
+
+    __slots__ = ['_solver', '_condition', '_generation', '_board', '_faces', '_changes',
+                 '_loaded', '_words', '_closed', '_thread']
+
+    def __init__(self, rows=4, cols=4, lexicon=None):
+        """
+        Start a worker thread that solves rows x cols boards.  Uses the
+        shared lexicon unless another Lexicon is given.
+        """
+        self._solver = IncrementalSolver(rows, cols, lexicon)
+        self._condition = threading.Condition()
+        self._generation = 0
+        self._board = None      # faces of the latest board
+        self._faces = None      # board waiting to be solved in full
+        self._changes = {}      # cell -> face changes waiting to be made
+        self._loaded = None     # generation of the board the solver holds
+        self._words = None      # words of the latest board, once solved
+        self._closed = False
+        self._thread = threading.Thread(target=self.__work, name="BackgroundSolver", daemon=True)
+        self._thread.start()
+
+    def submit(self, faces):
+        """
+        Start solving the board showing faces (list of str, row by row),
+        cancelling any solve still in progress.  Returns at once.
+        """
+        with self._condition:
+            self._generation += 1
+            self._board = list(faces)
+            self._faces = list(faces)
+            self._changes = {}
+            self._words = None
+            self._condition.notify_all()
+
+    def update(self, changes):
+        """
+        Change some cells of the latest board: changes maps cells (row *
+        cols + col) to their new faces.  If the board has been solved,
+        only the paths through those cells are searched again; otherwise
+        its solve starts over on the changed board.  Returns at once.
+        """
+        with self._condition:
+            if self._board is None:
+                raise ValueError("no board has been submitted")
+            for cell, face in changes.items():
+                self._board[cell] = face
+            self._words = None
+            if self._loaded == self._generation:
+                self._changes.update(changes)
+            else:
+                self._generation += 1
+                self._faces = list(self._board)
+            self._condition.notify_all()
+
+    def cancel(self):
+        """Stop working on the current board without starting another."""
+        with self._condition:
+            self._generation += 1
+            self._board = None
+            self._faces = None
+            self._changes = {}
+            self._words = None
+            self._condition.notify_all()
+
+    def isDone(self):
+        """Returns True if the words of the latest board are ready."""
+        with self._condition:
+            return self._words is not None
+
+    def getWords(self, timeout=0):
+        """
+        Returns the frozenset of words on the latest board, waiting up to
+        timeout seconds (None: as long as it takes) for the solve to
+        finish.  Returns None if it has not finished by then.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._words is not None or self._closed, timeout)
+            return self._words
+
+    def getMaxScore(self, timeout=0):
+        """
+        Returns the score for finding every word on the latest board, or
+        None if the solve has not finished (see getWords).
+        """
+        words = self.getWords(timeout)
+        return None if words is None else scoreWords(words)
+
+    def close(self):
+        """Stop the worker thread."""
+        with self._condition:
+            self._closed = True
+            self._generation += 1
+            self._condition.notify_all()
+        self._thread.join()
+
+    def __work(self):
+        """
+        Worker thread: solve each board submitted, latest first, and
+        make the changes to it as they come.
+        """
+        condition = self._condition
+        solver = self._solver
+        while True:
+            with condition:
+                condition.wait_for(lambda: self._faces is not None or self._changes or self._closed)
+                if self._closed:
+                    return
+                generation = self._generation
+                faces = self._faces
+                changes = self._changes
+                self._faces = None
+                self._changes = {}
+            if faces is not None:
+                # a newer submit (or cancel) makes this solve stale
+                done = solver.load(faces, lambda: self._generation != generation)
+            else:
+                solver.setFaces(changes)
+                done = True
+            with condition:
+                if done and self._generation == generation:
+                    self._loaded = generation
+                    # words are only ready once no changes are waiting
+                    if not self._changes:
+                        self._words = frozenset(solver.getWords())
+                        condition.notify_all()
+
+
+if __name__ == "__main__":
+    from doctest import testmod
+    testmod()
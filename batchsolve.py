@@ -0,0 +1,262 @@
+"""
+Solves large streams of Boggle boards on all cores.
+
+Boards are fanned out in chunks over a process pool.  The lexicon is
+placed in shared memory once and every worker reads the same copy.
+Results come back in input order, and only a bounded number of chunks
+is ever in flight, so memory stays flat however long the stream is.
+
+Usage:
+    python batchsolve.py boards.txt [-o results.txt] [-w WORKERS]
+    python batchsolve.py --random 100000 --scaling
+
+Board files are text, one board per line in the form of
+bogglecubes.formatFaces (eg "AQuEB..."), or binary files written by
+boardio.  Each output line is the
+board, the number of words, and the words, separated by tabs.
+"""
+
+import argparse
+import itertools
+import math
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing import Pool, shared_memory
+
+from bitsolver import BitSolver, randomBoards
+from boardio import readBoards, readText
+from bogglecubes import formatFaces
+from lexicon import Lexicon, getLexicon
+
+# per-process state of a pool worker
+_worker = {}
+
+def _initWorker(shmName, nbytes, size, lexiconName):
+    """Pool initializer: attach to the shared lexicon (or load one)."""
+    if shmName is None:
+        lexicon = getLexicon(lexiconName)
+    else:
+        # the parent owns (and unlinks) the block; keep our handle open
+        # for as long as the lexicon reads from it
+        shm = shared_memory.SharedMemory(name=shmName)
+        _worker["shm"] = shm
+        lexicon = Lexicon(shm.buf[:nbytes].cast('I').toreadonly(), size)
+    _worker["lexicon"] = lexicon
+    _worker["solvers"] = {}
+
+def _solveChunk(chunk, rows, cols):
+    """Solve a list of boards; returns (results, pid, busy seconds)."""
+    start = time.perf_counter()
+    solvers = _worker["solvers"]
+    solver = solvers.get((rows, cols))
+    if solver is None:
+        solver = solvers[(rows, cols)] = BitSolver(rows, cols, _worker["lexicon"])
+    results = [solver.solve(faces) for faces in chunk]
+    return results, os.getpid(), time.perf_counter() - start
+
+
+class BatchStats:
+    """BatchStats collects the throughput of a batch run and how busy
+    each worker process was."""
+
+    __slots__ = ['_boards', '_words', '_start', '_elapsed', '_busy']
+
+    def __init__(self):
+        self._boards = 0
+        self._words = 0
+        self._start = time.perf_counter()
+        self._elapsed = 0.0
+        self._busy = {}  # pid -> seconds spent solving
+
+    def _record(self, results, pid, busy):
+        self._boards += len(results)
+        self._words += sum(len(words) for words in results)
+        self._busy[pid] = self._busy.get(pid, 0.0) + busy
+        self._elapsed = time.perf_counter() - self._start
+
+    def getBoards(self):
+        return self._boards
+
+    def getElapsed(self):
+        return self._elapsed
+
+    def getThroughput(self):
+        """Returns boards solved per second of wall time."""
+        return self._boards / self._elapsed if self._elapsed else 0.0
+
+    def getUtilisation(self):
+        """Returns a dict mapping worker pid to the fraction of wall time
+        it spent solving."""
+        if not self._elapsed:
+            return {}
+        return {pid: busy / self._elapsed for pid, busy in self._busy.items()}
+
+    def __str__(self):
+        lines = ["{} boards, {} words in {:.2f}s: {:.0f} boards/sec".format(
+                    self._boards, self._words, self._elapsed, self.getThroughput())]
+        for pid, share in sorted(self.getUtilisation().items()):
+            lines.append("  worker {}: {:5.1f}% busy".format(pid, 100 * share))
+        return "\n".join(lines)
+
+
+def solveBatch(boards, rows=4, cols=4, workers=None, chunkSize=64,
+               lexiconName='bogwords.txt', sharedLexicon=True, stats=None):
+    """
+    Generator that solves every board in the iterable boards (lists of
+    faces, row by row) on a pool of workers processes (default: one per
+    core), yielding each board's sorted word list in input order.  At
+    most a few chunks of chunkSize boards per worker are in flight at
+    once.  If stats (a BatchStats) is given it is updated as results
+    arrive.
+
+    >>> boards = randomBoards(10, 4, 4)
+    >>> results = list(solveBatch(iter(boards), workers=2, chunkSize=3))
+    >>> results == [BitSolver().solve(b) for b in boards]
+    True
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    shm = None
+    initargs = (None, 0, 0, lexiconName)
+    if sharedLexicon:
+        lexicon = getLexicon(lexiconName)
+        nodes = lexicon.getNodes().cast('B')
+        shm = shared_memory.SharedMemory(create=True, size=len(nodes))
+        shm.buf[:len(nodes)] = nodes
+        initargs = (shm.name, len(nodes), len(lexicon), lexiconName)
+
+    pool = Pool(workers, initializer=_initWorker, initargs=initargs)
+    try:
+        pending = deque()
+        boards = iter(boards)
+        exhausted = False
+        while True:
+            # keep every worker fed, but never read far ahead of the output
+            while not exhausted and len(pending) < 4 * workers:
+                chunk = [board for _, board in zip(range(chunkSize), boards)]
+                if not chunk:
+                    exhausted = True
+                    break
+                pending.append(pool.apply_async(_solveChunk, (chunk, rows, cols)))
+            if not pending:
+                break
+            results, pid, busy = pending.popleft().get()
+            if stats is not None:
+                stats._record(results, pid, busy)
+            yield from results
+    finally:
+        pool.terminate()
+        pool.join()
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+def gridFor(faces, size=None):
+    """
+    Returns (rows, cols) of the square board showing faces: size by size
+    if size is given, otherwise worked out from the number of faces.
+    Raises ValueError if the faces do not fill that grid.
+
+    >>> gridFor(["A"] * 25), gridFor(["A"] * 16, size=4)
+    ((5, 5), (4, 4))
+    >>> gridFor(["A"] * 17)
+    Traceback (most recent call last):
+    ...
+    ValueError: a board of 17 faces is not 4x4
+    """
+    if size is None:
+        size = math.isqrt(len(faces))
+    if size * size != len(faces):
+        raise ValueError("a board of {} faces is not {}x{}".format(len(faces), size, size))
+    return (size, size)
+
+def measureScaling(boards, rows=4, cols=4, maxWorkers=None, chunkSize=64):
+    """
+    Solve the list boards with 1, 2, ... maxWorkers processes and return
+    a list of (workers, boards per second) pairs.  Raises ValueError if
+    there are no boards.
+    """
+    if not boards:
+        raise ValueError("no boards to measure")
+    if maxWorkers is None:
+        maxWorkers = os.cpu_count() or 1
+    rates = []
+    for workers in range(1, maxWorkers + 1):
+        stats = BatchStats()
+        for _ in solveBatch(boards, rows, cols, workers, chunkSize, stats=stats):
+            pass
+        rates.append((workers, stats.getThroughput()))
+    return rates
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Solve Boggle boards in parallel.")
+    parser.add_argument("boards", nargs="?", help="board file, text or binary ('-' for text on stdin)")
+    parser.add_argument("-o", "--output", help="write results here instead of stdout")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("-c", "--chunk-size", type=int, default=64)
+    parser.add_argument("-s", "--size", type=int,
+                        help="board edge length (default: from the first board, or 4 with --random)")
+    parser.add_argument("--random", type=int, metavar="COUNT", help="solve COUNT random boards instead")
+    parser.add_argument("--scaling", action="store_true", help="report throughput for 1..WORKERS processes")
+    options = parser.parse_args(args)
+
+    rows = cols = options.size or 4
+    if options.random is not None:
+        boards = randomBoards(options.random, rows, cols)
+    elif options.boards is None:
+        parser.error("give a board file or --random COUNT")
+    elif options.boards == "-":
+        boards = readText(sys.stdin)
+    else:
+        boards = readBoards(options.boards)
+
+    if options.scaling:
+        boards = list(boards)
+        if not boards:
+            parser.exit(1, "no boards in {}: nothing to measure\n".format(options.boards))
+        try:
+            rows, cols = gridFor(boards[0], options.size)
+            rates = measureScaling(boards, rows, cols, options.workers, options.chunk_size)
+        except ValueError as e:
+            parser.exit(1, "{}\n".format(e))
+        for workers, rate in rates:
+            print("{:3d} workers: {:9.0f} boards/sec  ({:.2f}x)".format(
+                    workers, rate, rate / rates[0][1] if rates[0][1] else 0.0))
+        return
+
+    if options.random is None:
+        # peek at the first board to learn the grid size
+        first = next(boards, None)
+        if first is None:
+            return
+        try:
+            rows, cols = gridFor(first, options.size)
+        except ValueError as e:
+            parser.exit(1, "{}\n".format(e))
+        boards = itertools.chain([first], boards)
+
+    out = open(options.output, "w") if options.output else sys.stdout
+    stats = BatchStats()
+    # results come back in order, so pair them with the boards by queueing
+    # each board as it is sent out (the queue stays as short as the pool's)
+    sent = deque()
+    def remember(boards):
+        for board in boards:
+            sent.append(board)
+            yield board
+    try:
+        # a later board of another size is rejected by the solver
+        for words in solveBatch(remember(boards), rows, cols, options.workers,
+                                options.chunk_size, stats=stats):
+            out.write("{}\t{}\t{}\n".format(formatFaces(sent.popleft()), len(words), " ".join(words)))
+    except ValueError as e:
+        parser.exit(1, "{}\n".format(e))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(stats, file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""
+Reproducible benchmarks for the Boggle project.
+
+Every benchmark seeds the random number generators (brandom.randomize
+and its own random.Random) with fixed values, so each run measures the
+same work, and every time is the best of several runs.  Results are
+written as JSON and compared against a stored baseline; a metric that
+is worse than the baseline by more than the tolerance is reported as a
+regression (and the exit status is 1).
+
+Usage:
+    python benchmarks.py                  # run, compare to the baseline
+    python benchmarks.py --save-baseline  # run and store a new baseline
+    python benchmarks.py solve clicks     # run only some benchmarks
+    python benchmarks.py --backend tk     # draw on a real Tk window
+
+Metric names say which way is better: "..._per_sec" is higher-is-better,
+everything else (times, bytes, operation counts) is lower-is-better.
+Timings depend on the machine they were taken on, so the baseline
+records what kind of machine that was (see machineId).  Compared with
+a baseline from another kind of machine, timings only count as
+regressions beyond the wider --other-machine-tolerance; sizes and
+operation counts use the usual tolerance everywhere.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from brandom import randomize
+from bitsolver import BitSolver, IncrementalSolver, randomBoards
+from boggleengine import BoggleEngine, simulate
+from bogglesolver import solveFaces
+from lexicon import Lexicon, loadLexicon, getLexicon
+
+BASELINE = "benchmarks_baseline.json"
+RESULTS = "benchmark_results.json"
+SEED = 2024
+
+# name -> function returning a dict of metrics
+_benchmarks = {}
+
+def benchmark(func):
+    """Decorator that adds func to the suite under its own name."""
+    _benchmarks[func.__name__] = func
+    return func
+
+def _bestTime(func, repeat=7, number=1):
+    """Returns the fastest of repeat timings of one call to func(), in
+    seconds; each timing averages number calls."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = (time.perf_counter() - start) / number
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def _mappedBytes(kept):
+    """Returns the size of the file a Lexicon's nodes are mapped from (0
+    if they are not, or kept is not a Lexicon)."""
+    if not isinstance(kept, Lexicon):
+        return 0
+    owner = getattr(kept.getNodes(), "obj", None)
+    return len(owner) if isinstance(owner, mmap.mmap) else 0
+
+def _retainedBytes(build):
+    """Returns the memory still held by what build() returns: the Python
+    heap it uses, plus any file it has memory-mapped, which tracemalloc
+    cannot see."""
+    tracemalloc.start()
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size + _mappedBytes(kept)
+
+def _readLexiconSet(lexiconName='bogwords.txt'):
+    # how BoggleGame.__readLexicon used to read the word list
+    validWords = set()
+    with open(lexiconName) as f:
+        for line in f:
+            validWords.add(line.strip().upper())
+    return validWords
+
+def _makeWindow():
+    """Returns a GraphWin to draw boards on, or None if there is none."""
+    try:
+        from graphics import GraphWin
+        return GraphWin("Boggle benchmark", 400, 400)
+    except Exception:
+        return None
+
+
+@benchmark
+def lexicon():
+    """Time and memory to load the word list: through the game's own
+    __readLexicon, both the first time in a process and once shared,
+    and the ways it has been done (a set of words, a trie built from
+    text, the compiled file) on their own.  The bytes of a memory-mapped
+    load count the whole mapping, though its pages are shared between
+    processes and only read in as they are used."""
+    import lexicon as lexiconModule
+    from bogglegame import BoggleGame
+    loadLexicon()  # make sure the compiled file is up to date
+    # __readLexicon does not use the game, so no game (or window) is made
+    readLexicon = lambda: BoggleGame._BoggleGame__readLexicon(None)
+
+    def readCold():
+        lexiconModule._registry.clear()
+        return readLexicon()
+
+    metrics = {
+        "lexicon_game_read_sec": _bestTime(readLexicon, number=1000),
+        "lexicon_game_read_cold_sec": _bestTime(readCold, number=100),
+        "lexicon_game_read_cold_bytes": _retainedBytes(readCold),
+        "lexicon_set_load_sec": _bestTime(_readLexiconSet),
+        "lexicon_trie_build_sec": _bestTime(Lexicon.fromFile),
+        "lexicon_mmap_load_sec": _bestTime(loadLexicon, number=100),
+        "lexicon_set_bytes": _retainedBytes(_readLexiconSet),
+        "lexicon_trie_bytes": _retainedBytes(Lexicon.fromFile),
+        "lexicon_mmap_bytes": _retainedBytes(loadLexicon),
+    }
+    readLexicon()   # leave the shared copy in place
+    return metrics
+
+@benchmark
+def solve():
+    """Boards solved per second by both solvers, by grid size (each size
+    rolled from its own cube set), to show how solve time grows."""
+    lex = getLexicon()
+    metrics = {}
+    boards = randomBoards(200, 4, 4, SEED)
+    elapsed = _bestTime(lambda: [solveFaces(b, 4, 4, lex) for b in boards])
+    metrics["solve_reference_4x4_per_sec"] = len(boards) / elapsed
+    for size in (4, 5, 6):
+        boards = randomBoards(100, size, size, SEED)
+        solver = BitSolver(size, size, lex)
+        elapsed = _bestTime(lambda: [solver.solveSet(b) for b in boards])
+        metrics["solve_bits_{0}x{0}_per_sec".format(size)] = len(boards) / elapsed
+        if size > 4:
+            # the reference solver is slow; a few boards are enough
+            few = boards[:20]
+            elapsed = _bestTime(lambda: [solveFaces(b, size, size, lex) for b in few], repeat=3)
+            metrics["solve_reference_{0}x{0}_per_sec".format(size)] = len(few) / elapsed
+    return metrics
+
+@benchmark
+def reroll():
+    """Re-rolling one cube mid-round: updating the words incrementally
+    (only paths through the changed cell) against solving the board
+    again, on 4x4 and 6x6 boards."""
+    import random
+    from bogglecubes import CUBE_SETS, cubeSetFor
+    lex = getLexicon()
+    lex.getReversedPrefixes()   # built once per process; not part of a re-roll
+    metrics = {}
+    for size in (4, 6):
+        cubes = CUBE_SETS[cubeSetFor(size, size)]
+        rng = random.Random(SEED)
+        boards = randomBoards(10, size, size, SEED)
+        # 20 successive re-rolls, (cell, new face), on each board
+        rerolls = [[(rng.randrange(size * size), rng.choice(rng.choice(cubes))) for _ in range(20)]
+                   for _ in boards]
+        count = sum(map(len, rerolls))
+        solver = IncrementalSolver(size, size, lex)
+        full = BitSolver(size, size, lex)
+
+        def incremental():
+            # the time to load each board in full is left out
+            elapsed = 0.0
+            for board, changes in zip(boards, rerolls):
+                solver.load(board)
+                start = time.perf_counter()
+                for cell, face in changes:
+                    solver.setFaces({cell: face})
+                elapsed += time.perf_counter() - start
+            return elapsed
+
+        def resolve():
+            start = time.perf_counter()
+            for board, changes in zip(boards, rerolls):
+                board = list(board)
+                for cell, face in changes:
+                    board[cell] = face
+                    full.solveSet(board)
+            return time.perf_counter() - start
+
+        metrics["reroll_incremental_{0}x{0}_per_sec".format(size)] = count / min(incremental() for _ in range(5))
+        metrics["reroll_full_{0}x{0}_per_sec".format(size)] = count / min(resolve() for _ in range(5))
+    return metrics
+
+@benchmark
+def clicks():
+    """Clicks per second replayed through BoggleGame.doOneClick, which
+    applies the rules and draws the result (headless under the null
+    backend), and through BoggleEngine alone for the cost of the rules."""
+    import random
+    engine = BoggleEngine(randomBoards(1, 4, 4, SEED)[0])
+    metrics = {"engine_clicks_per_sec": max(simulate(engine, 100000, SEED) for _ in range(5))}
+    win = _makeWindow()
+    if win is None:
+        return metrics
+    from graphics import Point, getBackend
+    from bogglegame import BoggleGame
+    try:
+        randomize(SEED)
+        with BoggleGame(win) as game:
+            board = game._board
+            rng = random.Random(SEED)
+            size = board.getSize()
+            # the middle of random letters, so every click reaches the engine
+            points = [Point(board.getXInset() + size * (rng.randrange(4) + 0.5),
+                            board.getYInset() + size * (rng.randrange(4) + 0.5))
+                      for _ in range(2000)]
+            elapsed = _bestTime(lambda: [game.doOneClick(point) for point in points])
+            metrics["game_" + getBackend() + "_clicks_per_sec"] = len(points) / elapsed
+        return metrics
+    finally:
+        win.close()
+
+@benchmark
+def board():
+    """Drawing costs: shaking and recolouring a BoggleBoard.  Under the
+    null graphics backend this also counts canvas operations per call."""
+    win = _makeWindow()
+    if win is None:
+        return {}
+    from graphics import getBackend
+    from boggleboard import BoggleBoard
+    try:
+        randomize(SEED)
+        board = BoggleBoard(win)
+        count = 200
+        prefix = "board_" + getBackend() + "_"
+        metrics = {}
+        for name, func in [("shake", board.shakeCubes),
+                           ("reset_colors", board.resetColors),
+                           ("reset", board.reset)]:
+            randomize(SEED)
+            elapsed = _bestTime(lambda: [func() for _ in range(count)])
+            metrics[prefix + name + "_per_sec"] = count / elapsed
+            if hasattr(win, "getOpCounts"):
+                before = win.getOpCounts()
+                func()
+                after = win.getOpCounts()
+                for op in ("itemconfig", "update"):
+                    metrics[prefix + name + "_" + op + "s"] = after.get(op, 0) - before.get(op, 0)
+        return metrics
+    finally:
+        win.close()
+
+
+def runBenchmarks(names=None):
+    """Runs the named benchmarks (default: all), returning their metrics."""
+    results = {}
+    for name in names or _benchmarks:
+        if name not in _benchmarks:
+            raise ValueError("no benchmark named {!r}".format(name))
+        randomize(SEED)
+        metrics = _benchmarks[name]()
+        if not metrics:
+            print("{}: skipped (no display; try --backend null)".format(name), file=sys.stderr)
+        results.update(metrics)
+    return results
+
+def machineId():
+    """Returns a string naming this kind of machine and Python, for
+    baselines: not the host name, so a baseline holds on any machine
+    like the one it was saved on."""
+    return "{} {} cpus, Python {}".format(platform.machine(), os.cpu_count(),
+                                          platform.python_version())
+
+def saveBaseline(fileName, results):
+    """Stores results as the baseline for this machine in fileName."""
+    with open(fileName, "w") as f:
+        json.dump({"machine": machineId(), "metrics": results}, f, indent=2, sort_keys=True)
+
+def loadBaseline(fileName):
+    """
+    Returns (machine, metrics) stored in the baseline fileName; machine
+    is None for a baseline saved before machines were recorded, and
+    metrics is empty if there is no baseline.
+    """
+    try:
+        with open(fileName) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return (None, {})
+    if "metrics" not in data:
+        return (None, data)
+    return (data.get("machine"), data["metrics"])
+
+def higherIsBetter(metric):
+    return metric.endswith("_per_sec")
+
+def isTiming(metric):
+    """Returns True if metric is a time or a rate, which depend on the machine."""
+    return metric.endswith("_sec")
+
+def compare(results, baseline, tolerance=0.35):
+    """
+    Compares results with baseline (dicts of metrics) and returns a list
+    of (metric, baseline value, new value, change, regressed) tuples.
+    change is the fractional improvement (negative means worse).
+
+    >>> rows = compare({"a_per_sec": 50.0, "b_sec": 1.0}, {"a_per_sec": 100.0, "b_sec": 1.1})
+    >>> [(m, round(c, 2), r) for m, _, _, c, r in rows]
+    [('a_per_sec', -0.5, True), ('b_sec', 0.1, False)]
+    """
+    rows = []
+    for metric in sorted(results):
+        if metric not in baseline or not baseline[metric]:
+            continue
+        old = baseline[metric]
+        new = results[metric]
+        if higherIsBetter(metric):
+            change = new / old - 1
+        else:
+            change = old / new - 1 if new else float("inf")
+        rows.append((metric, old, new, change, change < -tolerance))
+    return rows
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Run the Boggle benchmarks.")
+    parser.add_argument("names", nargs="*", help="benchmarks to run: " + ", ".join(_benchmarks))
+    parser.add_argument("-o", "--output", default=RESULTS, help="where to write results")
+    parser.add_argument("-b", "--baseline", default=BASELINE, help="baseline to compare with")
+    parser.add_argument("-t", "--tolerance", type=float, default=0.35,
+                        help="allowed fractional slowdown before failing (default 0.35)")
+    parser.add_argument("--other-machine-tolerance", type=float, default=0.75,
+                        help="allowed slowdown of timings against a baseline from another "
+                             "kind of machine (default 0.75)")
+    parser.add_argument("--save-baseline", action="store_true", help="store results as the baseline")
+    parser.add_argument("--backend", choices=("tk", "null"), default=os.environ.get("GRAPHICS_BACKEND", "null"),
+                        help="graphics backend for the board and click benchmarks "
+                             "(default null, which needs no display)")
+    options = parser.parse_args(args)
+    # graphics reads this when it is first imported
+    os.environ["GRAPHICS_BACKEND"] = options.backend
+
+    results = runBenchmarks(options.names)
+    with open(options.output, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+    if options.save_baseline:
+        saveBaseline(options.baseline, results)
+        print("saved baseline for {} to {}".format(machineId(), options.baseline))
+        return 0
+
+    machine, baseline = loadBaseline(options.baseline)
+    sameMachine = machine == machineId()
+    if baseline and not sameMachine:
+        print("warning: baseline is from {}, not {}; timings only regress beyond {:.0%} "
+              "(use --save-baseline here for a closer check)".format(
+                  machine or "an unknown machine", machineId(), options.other_machine_tolerance))
+    regressions = 0
+    for metric, old, new, change, regressed in compare(results, baseline, options.tolerance):
+        if not sameMachine and isTiming(metric):
+            regressed = change < -options.other_machine_tolerance
+        regressions += regressed
+        print("{:32s} {:14.6g} {:14.6g} {:+7.1%}{}".format(
+                metric, old, new, change, "  REGRESSION" if regressed else ""))
+    for metric in sorted(set(results) - set(baseline)):
+        print("{:32s} {:>14s} {:14.6g}".format(metric, "-", results[metric]))
+    if not options.names:
+        for metric in sorted(set(baseline) - set(results)):
+            print("{:32s} {:14.6g} {:>14s}  not run".format(metric, baseline[metric], "-"))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,366 @@
+"""
+A graphics-free Boggle solver that keeps the grid in flat lists and
+tracks cells with integer bitmasks.  It returns the same words as
+bogglesolver.solveFaces, only faster.
+
+Run this file to benchmark boards solved per second, and how solve
+time grows, on 3x3 to 6x6 grids.
+"""
+
+import random
+import time
+
+from bogglecubes import CLASSIC, CUBE_SETS, cubeSetFor
+from bogglesolver import neighbours
+from boggleengine import wordScore
+from lexicon import getLexicon, WORD
+
+class BitSolver:
+    """A BitSolver solves boards of one size against one lexicon.  Cells
+    are numbered row by row and cell i is represented by bit 1 << i, so
+       *  _adjacent[i] is the bitmask of the cells next to cell i
+       *  the path being searched is a bitmask of visited cells
+
+    >>> solver = BitSolver(2, 3)
+    >>> solver.getAdjacent()[0] == 0b011010
+    True
+    >>> solver.solve(["C", "A", "T", "X", "R", "S"])
+    ['ARC', 'ART', 'CAR', 'CART', 'CAST', 'CAT', 'RAT', 'SAC', 'SAT', 'SAX', 'STAR', 'TAR', 'TAX', 'TSAR']
+    >>> BitSolver(2, 2).solve(["Qu", "I", "T", "E"])
+    ['QUIET', 'QUIT', 'QUITE', 'TIE']
+    """
+
+    __slots__ = ['_rows', '_cols', '_adjacent', '_lexicon']
+
+    def __init__(self, rows=4, cols=4, lexicon=None):
+        """
+        Construct a solver for rows x cols boards.  Uses the shared
+        lexicon unless another Lexicon is given.
+        """
+        self._rows = rows
+        self._cols = cols
+        self._adjacent = [sum(1 << other for other in cells)
+                          for cells in neighbours(rows, cols)]
+        self._lexicon = lexicon if lexicon is not None else getLexicon()
+
+    def getRows(self):
+        return self._rows
+
+    def getCols(self):
+        return self._cols
+
+    def getAdjacent(self):
+        """Returns the list of neighbour bitmasks, one per cell."""
+        return self._adjacent
+
+    def getLexicon(self):
+        return self._lexicon
+
+    def solve(self, faces):
+        """
+        Returns a sorted list of every lexicon word on the board whose
+        faces (list of str, row by row) are given.
+        """
+        return sorted(self.solveSet(faces))
+
+    def solveSet(self, faces, cancelled=None):
+        """
+        Returns the set of every lexicon word on the board.  If cancelled
+        (a function) is given, it is called before the search from each
+        cell; once it returns True the search stops and None is returned.
+
+        >>> BitSolver(2, 2).solveSet(["C", "A", "T", "S"], cancelled=lambda: True) is None
+        True
+        >>> sorted(BitSolver(2, 2).solveSet(["C", "A", "T", ""]))
+        ['ACT', 'CAT']
+        """
+        nodes = self._lexicon.getNodes()
+        adjacent = self._adjacent
+        faces = [face.upper() for face in faces]
+        if len(faces) != len(adjacent):
+            raise ValueError("expected {} faces, got {}".format(len(adjacent), len(faces)))
+        # the trie bit of each face's first letter, and of any letters
+        # after the first (the "U" of "QU"); blank faces are skipped
+        bits = [_letterBits(face) for face in faces]
+        heads = [letters[0] for letters in bits]
+        tails = [letters[1:] for letters in bits]
+        found = set()
+
+        def search(cell, node, visited, word):
+            # node is the trie node reached by the path ending at cell
+            mask = nodes[node]
+            if mask & WORD:
+                found.add(word)
+            first = nodes[node + 1]
+            free = adjacent[cell] & ~visited
+            while free:
+                low = free & -free
+                free ^= low
+                other = low.bit_length() - 1
+                bit = heads[other]
+                # only descend into neighbours that continue some word
+                if mask & bit:
+                    child = first + 2 * (mask & (bit - 1)).bit_count()
+                    for bit in tails[other]:
+                        submask = nodes[child]
+                        if not submask & bit:
+                            break
+                        child = nodes[child + 1] + 2 * (submask & (bit - 1)).bit_count()
+                    else:
+                        search(other, child, visited | low, word + faces[other])
+
+        rootMask = nodes[0]
+        rootFirst = nodes[1]
+        for cell in range(len(faces)):
+            if cancelled is not None and cancelled():
+                return None
+            bit = heads[cell]
+            if rootMask & bit:
+                child = rootFirst + 2 * (rootMask & (bit - 1)).bit_count()
+                for bit in tails[cell]:
+                    submask = nodes[child]
+                    if not submask & bit:
+                        break
+                    child = nodes[child + 1] + 2 * (submask & (bit - 1)).bit_count()
+                else:
+                    search(cell, child, 1 << cell, faces[cell])
+        return found
+
+
+def _letterBits(face):
+    """
+    Returns the trie bit of each letter of face (upper case).  Anything
+    but A-Z, or a blank face, gets bit 0, which no word continues with.
+
+    >>> _letterBits("QU"), _letterBits("")
+    ((65536, 1048576), (0,))
+    """
+    return tuple(1 << (ord(ch) - 65) if "A" <= ch <= "Z" else 0 for ch in face) or (0,)
+
+
+class IncrementalSolver(BitSolver):
+    """An IncrementalSolver keeps the solution of one board up to date as
+    some of its cells change.  It remembers every path that spells a
+    word, as (word, bitmask of its cells), so when cells change the
+    paths through them can simply be dropped.  New paths are found by
+    starting at each changed cell and searching outwards: backwards
+    with the lexicon's reversed prefixes for the start of the word,
+    then forwards from the cell for the rest.  Only paths that pass
+    through a changed cell are ever searched.
+
+    >>> solver = IncrementalSolver(2, 2)
+    >>> solver.load(["C", "A", "T", "S"])
+    True
+    >>> sorted(solver.getWords()), solver.getScore()
+    (['ACT', 'CAST', 'CAT', 'SAC', 'SAT', 'SCAT'], 6)
+    >>> solver.setFaces({3: "R"})
+    >>> sorted(solver.getWords()) == BitSolver(2, 2).solve(["C", "A", "T", "R"])
+    True
+    >>> solver.setFaces({3: "S", 0: "Qu"}); sorted(solver.getWords())
+    ['QUA', 'SAT', 'SQUAT']
+    >>> solver.setFaces({0: ""}); sorted(solver.getWords())
+    ['SAT']
+    """
+
+    __slots__ = ['_faces', '_paths', '_counts', '_score']
+
+    def __init__(self, rows=4, cols=4, lexicon=None):
+        super().__init__(rows, cols, lexicon)
+        self._faces = None
+        self._paths = []    # (word, cells bitmask) for every path spelling a word
+        self._counts = {}   # word -> number of paths spelling it
+        self._score = 0
+
+    def load(self, faces, cancelled=None):
+        """
+        Solve the board showing faces (list of str, row by row) in full.
+        If cancelled (a function) is given, it is checked before each
+        starting cell; once it returns True the load stops, leaving no
+        words, and False is returned.  Otherwise returns True.
+        """
+        if len(faces) != len(self._adjacent):
+            raise ValueError("expected {} faces, got {}".format(len(self._adjacent), len(faces)))
+        self._faces = [face.upper() for face in faces]
+        self._paths = []
+        self._counts = {}
+        self._score = 0
+        return self.__addPaths(range(len(faces)), cancelled)
+
+    def getFaces(self):
+        return self._faces
+
+    def getWords(self):
+        """Returns the words on the board (a set-like view)."""
+        return self._counts.keys()
+
+    def getScore(self):
+        """Returns the score for finding every word on the board."""
+        return self._score
+
+    def setFaces(self, changes):
+        """
+        Change the board: changes maps cells to their new faces.  Only
+        the paths through those cells are searched again.
+        """
+        targets = 0
+        for cell, face in changes.items():
+            targets |= 1 << cell
+            self._faces[cell] = face.upper()
+        # drop the paths through the changed cells
+        kept = []
+        counts = self._counts
+        for path in self._paths:
+            if path[1] & targets:
+                word = path[0]
+                if counts[word] == 1:
+                    del counts[word]
+                    self._score -= wordScore(word)
+                else:
+                    counts[word] -= 1
+            else:
+                kept.append(path)
+        self._paths = kept
+        self.__addPaths(changes)
+
+    def __addPaths(self, cells, cancelled=None):
+        """
+        Find every path through the given cells and add it; a path
+        through several of them is found from the first one only.
+        Returns False, adding nothing, if cancelled() turns True first.
+        """
+        nodes = self._lexicon.getNodes()
+        adjacent = self._adjacent
+        faces = self._faces
+        # the trie bits of each face's letters, forwards and backwards
+        bits = [_letterBits(face) for face in faces]
+        rbits = [letters[::-1] for letters in bits]
+        found = []
+        blocked = 0
+
+        def ahead(cell, node, visited, word):
+            # extend the word forwards from cell
+            mask = nodes[node]
+            if mask & WORD:
+                # the cells blocked off for this search are not on the path
+                found.append((word, visited & ~blocked))
+            first = nodes[node + 1]
+            free = adjacent[cell] & ~visited
+            while free:
+                low = free & -free
+                free ^= low
+                other = low.bit_length() - 1
+                letters = bits[other]
+                bit = letters[0]
+                if mask & bit:
+                    child = first + 2 * (mask & (bit - 1)).bit_count()
+                    for bit in letters[1:]:
+                        submask = nodes[child]
+                        if not submask & bit:
+                            break
+                        child = nodes[child + 1] + 2 * (submask & (bit - 1)).bit_count()
+                    else:
+                        ahead(other, child, visited | low, word + faces[other])
+
+        def behind(start, cell, rnode, visited, prefix):
+            # extend the start of the word backwards from cell; once it
+            # is a whole prefix, carry on forwards from the start cell
+            node = forward[rnode >> 1]
+            if node >= 0:
+                ahead(start, node, visited, prefix)
+            mask = rnodes[rnode]
+            first = rnodes[rnode + 1]
+            free = adjacent[cell] & ~visited
+            while free:
+                low = free & -free
+                free ^= low
+                other = low.bit_length() - 1
+                letters = rbits[other]
+                bit = letters[0]
+                if mask & bit:
+                    child = first + 2 * (mask & (bit - 1)).bit_count()
+                    for bit in letters[1:]:
+                        submask = rnodes[child]
+                        if not submask & bit:
+                            break
+                        child = rnodes[child + 1] + 2 * (submask & (bit - 1)).bit_count()
+                    else:
+                        behind(start, other, child, visited | low, faces[other] + prefix)
+
+        if len(cells) == len(faces):
+            # every path: just search forwards from every cell
+            for cell in cells:
+                if cancelled is not None and cancelled():
+                    return False
+                node = self._lexicon.child(0, faces[cell]) if faces[cell] else -1
+                if node >= 0:
+                    ahead(cell, node, 1 << cell, faces[cell])
+        else:
+            reversedLexicon, forward = self._lexicon.getReversedPrefixes()
+            rnodes = reversedLexicon.getNodes()
+            for cell in cells:
+                rnode = reversedLexicon.child(0, faces[cell][::-1]) if faces[cell] else -1
+                if rnode >= 0:
+                    behind(cell, cell, rnode, blocked | 1 << cell, faces[cell])
+                blocked |= 1 << cell
+
+        counts = self._counts
+        for path in found:
+            word = path[0]
+            if word in counts:
+                counts[word] += 1
+            else:
+                counts[word] = 1
+                self._score += wordScore(word)
+        self._paths.extend(found)
+        return True
+
+
+def randomBoards(count, rows, cols, seed=0, cubes=None):
+    """
+    Returns count random boards (lists of faces) of size rows x cols,
+    rolled from cubes.  By default the cube set that fills the board is
+    used (see bogglecubes.cubeSetFor), or the classic cubes if none
+    does.  Boards larger than the cube set reuse cubes.
+
+    >>> from bogglesolver import solveFaces
+    >>> lex = getLexicon()
+    >>> all(BitSolver(4, 4, lex).solve(b) == solveFaces(b, 4, 4, lex)
+    ...     for b in randomBoards(20, 4, 4))
+    True
+    """
+    if cubes is None:
+        name = cubeSetFor(rows, cols)
+        cubes = CUBE_SETS[name] if name is not None else CLASSIC
+    rng = random.Random(seed)
+    cells = rows * cols
+    pool = list(cubes) * (cells // len(cubes) + 1)
+    return [[rng.choice(cube) for cube in rng.sample(pool, cells)]
+            for _ in range(count)]
+
+def benchmark(rows, cols, count=200, seed=0):
+    """
+    Solve count random rows x cols boards and return (boards per
+    second, average number of words per board).
+    """
+    boards = randomBoards(count, rows, cols, seed)
+    solver = BitSolver(rows, cols)
+    words = 0
+    start = time.perf_counter()
+    for board in boards:
+        words += len(solver.solveSet(board))
+    elapsed = time.perf_counter() - start
+    return count / elapsed, words / count
+
+
+if __name__ == "__main__":
+    from doctest import testmod
+    testmod()
+
+    # the number of paths explodes with the grid size, but pruning by
+    # prefix keeps the search close to the number of words found
+    first = None
+    for size in (3, 4, 5, 6):
+        rate, words = benchmark(size, size)
+        first = first or rate
+        print("{0}x{0}: {1:8.0f} boards/sec  {2:7.3f} ms/board ({3:4.1f}x 3x3)  {4:6.1f} words/board".format(
+                size, rate, 1000 / rate, first / rate, words))
@@ -7,6 +7,13 @@ clicks inside of those regions.'''
 
 from graphics import *
 
+def windowSize(rows, cols, xInset=50, yInset=50, size=50):
+    """
+    Returns the (width, height) of a window that fits a Board with these
+    dimensions, its text areas and buttons: (400, 400) for a 4x4 grid.
+    """
+    return (xInset + size * cols + 150, yInset + size * rows + 150)
+
 class Board:
     # _win: graphical window on which we will draw our board
     # _xInset: avoids drawing in corner of window
@@ -49,6 +56,9 @@ class Board:
     def getBoard(self):
         return self
 
+    def getExitButton(self):
+        return self._exitButton
+
     def __makeTextArea(self, point, fontsize=18, color="black", text=""):
         """Creates a text area"""
         textArea = Text(point, text)
@@ -67,13 +77,17 @@ class Board:
         text.draw(self._win)
         return rect
 
+    def __gridBottom(self):
+        """Returns the y coordinate of the bottom edge of the grid"""
+        return self._yInset + self._size * self._rows
+
     def __drawTextAreas(self):
         """Draw the text areas to the right/lower/upper side of main grid"""
         # draw main text area (right of grid)
-        self._textArea = self.__makeTextArea(Point(self._xInset * self._rows + self._size * 2,
+        self._textArea = self.__makeTextArea(Point(self._xInset + self._size * self._cols + 50,
                                                    self._yInset + 50), 14)
         #draw the text area below grid
-        self._lowerWord = self.__makeTextArea(Point(160, 275))
+        self._lowerWord = self.__makeTextArea(Point(160, self.__gridBottom() + 25))
         #draw the text area above grid
         self._upperWord = self.__makeTextArea(Point(160, 25), color="red")
 
@@ -96,9 +110,10 @@ class Board:
 
     def __drawButtons(self):
         """Create reset and exit buttons"""
-        p1 = Point(50, 300); p2 = Point(130, 350)
+        top = self.__gridBottom() + 50
+        p1 = Point(50, top); p2 = Point(130, top + 50)
         self._resetButton = self._makeRect(p1, p2, text="RESET")
-        p3 = Point(170, 300); p4 = Point(250, 350)
+        p3 = Point(170, top); p4 = Point(250, top + 50)
         self._exitButton = self._makeRect(p3, p4, text="EXIT")        
 
     def drawBoard(self):
@@ -149,9 +164,9 @@ class Board:
         '''
         ptX = point.getX()
         ptY = point.getY()
-        maxY = self._size * (self._rows + 1)
-        maxX = self._size * (self._cols + 1)
-        return ptX <= maxX and ptY <= maxY and ptX >= self._xInset and ptY >= self._yInset
+        maxY = self._yInset + self._size * self._rows
+        maxX = self._xInset + self._size * self._cols
+        return ptX < maxX and ptY < maxY and ptX >= self._xInset and ptY >= self._yInset
 
     # clicked in exit button?
     def inExit(self, point):
@@ -0,0 +1,283 @@
+"""
+Generates random boards that meet constraints: at least N words, a
+score band, a word that must be on the board, no word longer than K
+letters, and a range of vowel cells.
+
+Boards are rolled exactly as BoggleBoard.shakeCubes rolls them and
+rejected until one meets every constraint, so the boards returned are
+uniformly random among those that do.  Solving is by far the costly
+step, so each board is first put through cheap prefilters that need no
+solve:
+
+  * the letters of the board (a histogram over its faces) must include
+    every letter of the required word, as often as the word uses it;
+  * the number of cells showing a vowel must be in the vowel range.
+
+Both only reject boards that could never meet the constraints, so they
+save solves without changing which boards come out.
+
+Sampling runs in chunks on a process pool; chunk k always uses the
+random stream RandomStream(seed).jumped(k), so the boards found do not
+depend on the number of workers.
+
+Usage:
+    python boardconstraints.py -n 10 --min-words 150 --must-contain QUEST
+"""
+
+import argparse
+import math
+import os
+import sys
+from collections import Counter
+from multiprocessing import Pool
+
+from bitsolver import BitSolver
+from boggleengine import scoreWords
+from bogglecubes import CUBE_SETS, formatFaces, rollCubes
+from brandom import RandomStream
+from lexicon import getLexicon
+
+VOWELS = frozenset("AEIOU")
+
+# boards generateBoards rolls before giving up, unless told otherwise
+MAX_BOARDS = 1000000
+
+def countVowels(faces):
+    """
+    Returns the number of cells whose face has a vowel in it.
+
+    >>> countVowels(["Qu", "A", "T", "S"])
+    2
+    """
+    return sum(1 for face in faces if not VOWELS.isdisjoint(face.upper()))
+
+
+class Constraints:
+    """Constraints says which boards are wanted.  Every limit is
+    optional (None: no limit).
+
+    >>> wanted = Constraints(minWords=5, mustContain="cast")
+    >>> wanted.prefilter(["C", "A", "T", "S"]), wanted.prefilter(["C", "A", "T", "E"])
+    (True, False)
+    >>> wanted.accepts({"ACT", "CAST", "CAT", "SAC", "SAT", "SCAT"})
+    True
+    >>> Constraints(maxWordLength=3).accepts({"CAT", "CAST"})
+    False
+    >>> Constraints(mustContain="pizza").check(CUBE_SETS["classic"])
+    Traceback (most recent call last):
+    ...
+    ValueError: the cubes cannot show the letters of PIZZA
+    >>> Constraints(mustContain="xyzzy").check(CUBE_SETS["classic"])
+    Traceback (most recent call last):
+    ...
+    ValueError: XYZZY is not in the lexicon
+    """
+
+    __slots__ = ['_minWords', '_minScore', '_maxScore', '_mustContain',
+                 '_maxWordLength', '_minVowels', '_maxVowels', '_letters']
+
+    def __init__(self, minWords=None, minScore=None, maxScore=None, mustContain=None,
+                 maxWordLength=None, minVowels=None, maxVowels=None):
+        """
+        Boards must have at least minWords words, a best possible score
+        from minScore to maxScore, the word mustContain, no word longer
+        than maxWordLength letters, and from minVowels to maxVowels cells
+        showing a vowel.
+        """
+        if minScore is not None and maxScore is not None and minScore > maxScore:
+            raise ValueError("the score band is empty")
+        if minVowels is not None and maxVowels is not None and minVowels > maxVowels:
+            raise ValueError("the vowel range is empty")
+        if mustContain is not None and not mustContain.isalpha():
+            raise ValueError("{!r} is not a word".format(mustContain))
+        self._minWords = minWords
+        self._minScore = minScore
+        self._maxScore = maxScore
+        self._mustContain = mustContain.upper() if mustContain else None
+        self._maxWordLength = maxWordLength
+        self._minVowels = minVowels
+        self._maxVowels = maxVowels
+        self._letters = Counter(self._mustContain or "")
+
+    def check(self, cubes, lexicon=None):
+        """
+        Raises ValueError if no board rolled from cubes (a tuple of
+        cubes) could meet the constraints: the required word is not in
+        lexicon (default: the shared one), cannot fit on the board, needs
+        more of a letter than the cubes can show, or is longer than the
+        longest word allowed.
+        """
+        if self._minVowels is not None and self._minVowels > len(cubes):
+            raise ValueError("a board has only {} cells".format(len(cubes)))
+        word = self._mustContain
+        if word is None:
+            return
+        if self._maxWordLength is not None and len(word) > self._maxWordLength:
+            raise ValueError("{} is longer than {} letters".format(word, self._maxWordLength))
+        lexicon = lexicon if lexicon is not None else getLexicon()
+        if not lexicon.contains(word):
+            raise ValueError("{} is not in the lexicon".format(word))
+        if len(word) > len(cubes) * max(len(face) for cube in cubes for face in cube):
+            raise ValueError("{} is too long for a board of {} cells".format(word, len(cubes)))
+        # each cube shows one face, so a letter shows on at most as many
+        # cells as there are cubes with it on some face
+        for letter, count in self._letters.items():
+            if sum(1 for cube in cubes if any(letter in face.upper() for face in cube)) < count:
+                raise ValueError("the cubes cannot show the letters of {}".format(word))
+
+    def prefilter(self, faces):
+        """
+        Returns False if the board showing faces (list of str) cannot meet
+        the constraints, judged without solving it.  True means it might.
+        """
+        if self._minVowels is not None or self._maxVowels is not None:
+            vowels = countVowels(faces)
+            if self._minVowels is not None and vowels < self._minVowels:
+                return False
+            if self._maxVowels is not None and vowels > self._maxVowels:
+                return False
+        if self._letters:
+            # a path spells the word from whole faces, so the board's
+            # letters must cover the word's
+            letters = Counter("".join(faces).upper())
+            for letter, count in self._letters.items():
+                if letters[letter] < count:
+                    return False
+        return True
+
+    def accepts(self, words):
+        """Returns True if a board with these words (a set of str) qualifies."""
+        if self._minWords is not None and len(words) < self._minWords:
+            return False
+        if self._mustContain is not None and self._mustContain not in words:
+            return False
+        if self._maxWordLength is not None and any(len(word) > self._maxWordLength for word in words):
+            return False
+        if self._minScore is not None or self._maxScore is not None:
+            score = scoreWords(words)
+            if self._minScore is not None and score < self._minScore:
+                return False
+            if self._maxScore is not None and score > self._maxScore:
+                return False
+        return True
+
+
+def _sampleChunk(seed, chunk, chunkSize, cubeSet, constraints):
+    """
+    Pool task: roll chunkSize boards from chunk number chunk.  Returns
+    (boards that qualify, number rolled, number solved).
+    """
+    cubes = CUBE_SETS[cubeSet]
+    size = math.isqrt(len(cubes))
+    solver = BitSolver(size, len(cubes) // size)
+    rng = RandomStream(seed).jumped(chunk)
+    found = []
+    solved = 0
+    for _ in range(chunkSize):
+        faces = rollCubes(cubes, rng)
+        if constraints.prefilter(faces):
+            solved += 1
+            if constraints.accepts(solver.solveSet(faces)):
+                found.append(faces)
+    return (found, chunkSize, solved)
+
+def _sampleTask(task):
+    return _sampleChunk(*task)
+
+
+def generateBoards(count, constraints, seed=0, cubeSet="classic", workers=None,
+                   chunkSize=200, maxBoards=MAX_BOARDS, stats=None):
+    """
+    Returns a list of count boards (lists of faces) that meet
+    constraints, rolled from the cube set named cubeSet on workers
+    processes (default: one per core).  Raises ValueError if the
+    constraints cannot be met (see Constraints.check), or if fewer than
+    count boards are found in maxBoards rolls.  If stats is a dict, the
+    number of boards rolled, solved and prefiltered out is stored in it.
+
+    >>> stats = {}
+    >>> boards = generateBoards(2, Constraints(minWords=60, mustContain="TEA"), seed=1, workers=1, stats=stats)
+    >>> len(boards), all(len(BitSolver().solve(faces)) >= 60 for faces in boards)
+    (2, True)
+    >>> stats["solved"] < stats["rolled"] == stats["solved"] + stats["prefiltered"]
+    True
+    >>> generateBoards(1, Constraints(minWords=10000), workers=1, maxBoards=400)
+    Traceback (most recent call last):
+    ...
+    ValueError: found 0 of 1 boards in 400 rolls
+    """
+    if cubeSet not in CUBE_SETS:
+        raise ValueError("unknown cube set {!r}".format(cubeSet))
+    constraints.check(CUBE_SETS[cubeSet])
+    stats = {} if stats is None else stats
+    stats.update(rolled=0, solved=0, prefiltered=0)
+    boards = []
+
+    def tasks():
+        for chunk in range(-(-maxBoards // chunkSize)):
+            yield (seed, chunk, chunkSize, cubeSet, constraints)
+
+    if workers == 1:
+        results = map(_sampleTask, tasks())
+        pool = None
+    else:
+        pool = Pool(workers)
+        # results come back in chunk order, so the boards found do not
+        # depend on the number of workers
+        results = pool.imap(_sampleTask, tasks())
+    try:
+        for found, rolled, solved in results:
+            boards.extend(found)
+            stats["rolled"] += rolled
+            stats["solved"] += solved
+            stats["prefiltered"] += rolled - solved
+            if len(boards) >= count:
+                break
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    if len(boards) < count:
+        raise ValueError("found {} of {} boards in {} rolls".format(len(boards), count, stats["rolled"]))
+    return boards[:count]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Generate random boards that meet constraints.")
+    parser.add_argument("-n", "--count", type=int, default=10, help="boards to generate")
+    parser.add_argument("--min-words", type=int)
+    parser.add_argument("--min-score", type=int)
+    parser.add_argument("--max-score", type=int)
+    parser.add_argument("--must-contain", help="a word every board must have")
+    parser.add_argument("--max-word-length", type=int)
+    parser.add_argument("--min-vowels", type=int)
+    parser.add_argument("--max-vowels", type=int)
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("--cubes", choices=sorted(CUBE_SETS), default="classic")
+    parser.add_argument("--max-boards", type=int, default=MAX_BOARDS,
+                        help="give up after rolling this many boards (default {})".format(MAX_BOARDS))
+    options = parser.parse_args(args)
+
+    constraints = Constraints(options.min_words, options.min_score, options.max_score,
+                              options.must_contain, options.max_word_length,
+                              options.min_vowels, options.max_vowels)
+    stats = {}
+    try:
+        boards = generateBoards(options.count, constraints, options.seed, options.cubes,
+                                options.workers, maxBoards=options.max_boards, stats=stats)
+    except ValueError as e:
+        parser.exit(1, "{}\n".format(e))
+    for faces in boards:
+        print(formatFaces(faces))
+    print("{} boards rolled, {} solved, {} ({:.1%}) rejected by the prefilter".format(
+        stats["rolled"], stats["solved"], stats["prefiltered"],
+        stats["prefiltered"] / stats["rolled"] if stats["rolled"] else 0.0), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main()
+    else:
+        from doctest import testmod
+        testmod()
@@ -0,0 +1,96 @@
+"""
+Generates Boggle boards in bulk as compact NumPy arrays, for Monte Carlo
+studies over millions of boards.  Requires NumPy.
+
+A board is a row of cell codes (uint8), read row by row.  The code of a
+cell is cube * 6 + face: which cube landed there, and which of its six
+faces is up.  faceTable(cubes)[code] gives the letter(s) showing.  A
+set of more than 42 cubes has codes past 255, so its boards are uint16.
+"""
+
+try:
+    import numpy as np
+except ImportError:   # pragma: no cover
+    raise ImportError("boardgen needs NumPy (pip install numpy)")
+
+from bogglecubes import CLASSIC, FACES_PER_CUBE, faceTable
+from brandom import RandomStream
+
+def _generator(rng):
+    """Returns a numpy Generator for rng (None, a Generator or a RandomStream)."""
+    if rng is None:
+        return np.random.default_rng()
+    if isinstance(rng, RandomStream):
+        return rng.toNumpy()
+    return rng
+
+def codeType(cubes):
+    """
+    Returns the smallest numpy dtype that holds every cell code of cubes.
+
+    >>> codeType(CLASSIC), codeType(CLASSIC * 3)
+    (<class 'numpy.uint8'>, <class 'numpy.uint16'>)
+    """
+    return np.uint8 if len(cubes) * FACES_PER_CUBE <= 256 else np.uint16
+
+def generateBoards(count, cubes=CLASSIC, rng=None):
+    """
+    Returns a (count, len(cubes)) array of random boards, of type
+    codeType(cubes): each row places every cube once, in random order,
+    with a random face up.  rng is a numpy Generator or a
+    brandom.RandomStream (default: a fresh unseeded Generator).
+
+    >>> boards = generateBoards(1000, rng=np.random.default_rng(0))
+    >>> boards.shape, boards.dtype
+    ((1000, 16), dtype('uint8'))
+    >>> bool((np.sort(boards // 6, axis=1) == np.arange(16)).all())
+    True
+    >>> decodeBoard(generateBoards(1, rng=np.random.default_rng(1))[0])
+    ['T', 'G', 'R', 'H', 'P', 'A', 'Z', 'D', 'A', 'D', 'J', 'E', 'G', 'H', 'E', 'W']
+    >>> from brandom import RandomStream
+    >>> bool((generateBoards(5, rng=RandomStream(9)) == generateBoards(5, rng=RandomStream(9))).all())
+    True
+    >>> stream = RandomStream(9)
+    >>> bool((generateBoards(5, rng=stream) == generateBoards(5, rng=stream)).all())
+    False
+    >>> boards = generateBoards(100, CLASSIC * 3, rng=np.random.default_rng(0))
+    >>> boards.dtype, int(boards.max()) > 255, bool((np.sort(boards // 6, axis=1) == np.arange(48)).all())
+    (dtype('uint16'), True, True)
+    """
+    rng = _generator(rng)
+    cells = len(cubes)
+    dtype = codeType(cubes)
+    # shuffle a copy of 0..cells-1 independently in every row
+    order = rng.permuted(np.broadcast_to(np.arange(cells, dtype=dtype), (count, cells)), axis=1)
+    faces = rng.integers(0, FACES_PER_CUBE, size=(count, cells), dtype=dtype)
+    order *= FACES_PER_CUBE
+    order += faces
+    return order
+
+def iterBoards(total, chunkSize=1 << 20, cubes=CLASSIC, rng=None):
+    """
+    Yields total random boards as a series of arrays of at most
+    chunkSize rows, so any number of boards can be generated in
+    bounded memory.
+    """
+    rng = _generator(rng)
+    while total > 0:
+        count = min(chunkSize, total)
+        yield generateBoards(count, cubes, rng)
+        total -= count
+
+def decodeBoard(codes, cubes=CLASSIC):
+    """Returns the faces (list of str) of one board's cell codes."""
+    table = faceTable(cubes)
+    return [table[code] for code in codes.tolist()]
+
+
+if __name__ == "__main__":
+    from doctest import testmod
+    testmod()
+
+    import time
+    start = time.perf_counter()
+    boards = sum(len(chunk) for chunk in iterBoards(10000000, rng=np.random.default_rng(0)))
+    elapsed = time.perf_counter() - start
+    print("{} boards in {:.2f}s: {:.0f} boards/sec".format(boards, elapsed, boards / elapsed))
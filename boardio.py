@@ -0,0 +1,314 @@
+"""
+Reads and writes files of Boggle boards.
+
+Two formats are supported:
+
+  * text: one board per line in the form of bogglecubes.formatFaces
+    (eg "AQuEB..."; all-uppercase "AQUEB..." is read too).
+  * binary: a 16-byte header followed by fixed-size records of one byte
+    per cell, read row by row.  Each byte is a cell code,
+    cube * 6 + face, so the record says which cube landed in each cell
+    and which face is up (bogglecubes.faceTable maps codes to faces).
+
+Binary files are written through a large buffer and read through mmap,
+so files of millions of boards stream in bounded memory, and board k
+can be read directly.  Readers hand out faces (lists of str) or raw
+codes, which is what the solvers and boardgen work on; no BoggleLetter
+objects are involved.
+
+Usage:
+    python boardio.py boards.txt boards.bin   # convert text to binary
+    python boardio.py boards.bin boards.txt   # and back
+"""
+
+import math
+import mmap
+import struct
+import sys
+
+from bogglecubes import CLASSIC, CUBE_SETS, FACES_PER_CUBE, faceTable, cubeSetFor, \
+     formatFaces, parseFaces
+
+# magic, version, rows, cols, cube set name (ASCII, zero padded)
+_HEADER = struct.Struct("<4sBBB9s")
+_MAGIC = b"BBRD"
+_VERSION = 1
+
+def encodeFaces(faces, cubes=CLASSIC):
+    """
+    Returns the cell codes (bytes) of a board given only its faces, by
+    finding a cube for every cell that shows that face.  Raises
+    ValueError if the cubes cannot make the board.
+
+    >>> from bogglecubes import rollCubes
+    >>> faces = rollCubes()
+    >>> [faceTable()[code] for code in encodeFaces(faces)] == faces
+    True
+    >>> encodeFaces(["Qu"] * 16)
+    Traceback (most recent call last):
+    ...
+    ValueError: the cubes cannot make this board
+    """
+    if len(faces) != len(cubes):
+        raise ValueError("a board needs one face per cube")
+    # the cubes (and face on each) that can show each cell's face
+    choices = []
+    for face in faces:
+        face = face.capitalize()
+        choices.append([(cube, cubes[cube].index(face))
+                        for cube in range(len(cubes)) if face in cubes[cube]])
+    owner = [None] * len(cubes)   # cube -> cell using it
+
+    def place(cell, tried):
+        # find a cube for cell, moving other cells to new cubes if needed
+        for cube, _ in choices[cell]:
+            if cube not in tried:
+                tried.add(cube)
+                if owner[cube] is None or place(owner[cube], tried):
+                    owner[cube] = cell
+                    return True
+        return False
+
+    for cell in range(len(faces)):
+        if not place(cell, set()):
+            raise ValueError("the cubes cannot make this board")
+    codes = [0] * len(faces)
+    for cube, cell in enumerate(owner):
+        codes[cell] = cube * FACES_PER_CUBE + dict(choices[cell])[cube]
+    return bytes(codes)
+
+
+class BoardWriter:
+    """A BoardWriter writes boards to a binary board file.  Use it as a
+    context manager (or call close) so the last buffered boards are
+    written.
+
+    >>> import os, tempfile
+    >>> fileName = os.path.join(tempfile.mkdtemp(), "boards.bin")
+    >>> from bogglecubes import rollCubes
+    >>> from brandom import RandomStream
+    >>> boards = [rollCubes(rng=RandomStream(0).jumped(k)) for k in range(3)]
+    >>> with BoardWriter(fileName) as writer:
+    ...     for faces in boards:
+    ...         writer.writeFaces(faces)
+    >>> with BoardReader(fileName) as reader:
+    ...     len(reader), list(reader.iterFaces()) == boards
+    (3, True)
+    """
+
+    __slots__ = ['_file', '_buffer', '_bufferSize', '_cells', '_cubes', '_count']
+
+    def __init__(self, fileName, rows=4, cols=4, cubes="classic", bufferSize=1 << 20):
+        """
+        Create the file fileName for boards of rows x cols cells made from
+        the cube set named cubes (a key of bogglecubes.CUBE_SETS).  Up to
+        bufferSize bytes of boards are collected before each write.
+        """
+        if cubes not in CUBE_SETS:
+            raise ValueError("unknown cube set {!r}".format(cubes))
+        if len(CUBE_SETS[cubes]) != rows * cols:
+            raise ValueError("the {} cubes do not fill a {}x{} board".format(cubes, rows, cols))
+        self._file = open(fileName, "wb")
+        self._file.write(_HEADER.pack(_MAGIC, _VERSION, rows, cols, cubes.encode("ascii")))
+        self._buffer = bytearray()
+        self._bufferSize = bufferSize
+        self._cells = rows * cols
+        self._cubes = CUBE_SETS[cubes]
+        self._count = 0
+
+    def getCount(self):
+        """Returns the number of boards written so far."""
+        return self._count
+
+    def write(self, codes):
+        """Write one board given as its cell codes (bytes or ints)."""
+        if len(codes) != self._cells:
+            raise ValueError("a board has {} cells, not {}".format(self._cells, len(codes)))
+        self._buffer.extend(codes)
+        self._count += 1
+        if len(self._buffer) >= self._bufferSize:
+            self.flush()
+
+    def writeFaces(self, faces):
+        """Write one board given as its faces (list of str)."""
+        self.write(encodeFaces(faces, self._cubes))
+
+    def writeMany(self, boards):
+        """
+        Write many boards: a NumPy uint8 array with one board per row
+        (as made by boardgen) is written in one go; any other iterable
+        is written board by board.
+        """
+        if hasattr(boards, "tobytes"):
+            if boards.ndim != 2 or boards.shape[1] != self._cells or boards.dtype.itemsize != 1:
+                raise ValueError("expected an (N, {}) uint8 array".format(self._cells))
+            self.flush()
+            self._file.write(boards.tobytes())
+            self._count += len(boards)
+        else:
+            for codes in boards:
+                self.write(codes)
+
+    def flush(self):
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BoardReader:
+    """A BoardReader reads a binary board file through mmap, so opening
+    even a huge file is instant and boards are only read when used.
+    Board k is reader[k] (its cell codes, as bytes).
+
+    Arrays returned by toArray share the mapping, so drop them before
+    calling close.
+    """
+
+    __slots__ = ['_map', '_rows', '_cols', '_cubes', '_table', '_count']
+
+    def __init__(self, fileName):
+        with open(fileName, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < _HEADER.size:
+            self._map.close()
+            raise ValueError("{} is not a board file".format(fileName))
+        magic, version, rows, cols, cubes = _HEADER.unpack_from(self._map)
+        cubes = cubes.rstrip(b"\0").decode("ascii", "replace")
+        cells = rows * cols
+        if (magic != _MAGIC or version != _VERSION or cubes not in CUBE_SETS or
+            not cells or (len(self._map) - _HEADER.size) % cells):
+            self._map.close()
+            raise ValueError("{} is not a compatible board file".format(fileName))
+        self._rows = rows
+        self._cols = cols
+        self._cubes = CUBE_SETS[cubes]
+        self._table = faceTable(self._cubes)
+        self._count = (len(self._map) - _HEADER.size) // cells
+
+    def getRows(self):
+        return self._rows
+
+    def getCols(self):
+        return self._cols
+
+    def getCubes(self):
+        return self._cubes
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, k):
+        """Returns the cell codes (bytes) of board number k."""
+        if k < 0:
+            k += self._count
+        if not 0 <= k < self._count:
+            raise IndexError("board index out of range")
+        cells = self._rows * self._cols
+        start = _HEADER.size + k * cells
+        return self._map[start:start + cells]
+
+    def getFaces(self, k):
+        """Returns the faces (list of str, row by row) of board number k."""
+        table = self._table
+        return [table[code] for code in self[k]]
+
+    def __iter__(self):
+        """Yields the cell codes (bytes) of every board, in order."""
+        cells = self._rows * self._cols
+        data = self._map
+        for start in range(_HEADER.size, len(data), cells):
+            yield data[start:start + cells]
+
+    def iterFaces(self):
+        """Yields the faces (list of str) of every board, in order."""
+        table = self._table
+        for codes in self:
+            yield [table[code] for code in codes]
+
+    def toArray(self):
+        """
+        Returns all the boards as a read-only (N, cells) NumPy uint8
+        array that shares memory with the file.  Requires NumPy.
+        """
+        import numpy as np
+        return np.frombuffer(self._map, dtype=np.uint8, offset=_HEADER.size).reshape(
+            self._count, self._rows * self._cols)
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def isBoardFile(fileName):
+    """Returns True if fileName is a binary board file (not text)."""
+    with open(fileName, "rb") as f:
+        return f.read(len(_MAGIC)) == _MAGIC
+
+def readText(f):
+    """Yields the boards (lists of faces) in an open text board file."""
+    for line in f:
+        if line.strip():
+            yield parseFaces(line)
+
+def writeText(f, boards):
+    """Writes boards (lists of faces) to an open text file, one per line."""
+    f.writelines(formatFaces(faces) + "\n" for faces in boards)
+
+def readBoards(fileName):
+    """
+    Yields the boards (lists of faces) in a board file of either format.
+    """
+    if isBoardFile(fileName):
+        with BoardReader(fileName) as reader:
+            yield from reader.iterFaces()
+    else:
+        with open(fileName) as f:
+            yield from readText(f)
+
+def convert(inName, outName):
+    """
+    Converts a text board file to binary, or a binary one to text
+    (whichever inName is not).  Returns the number of boards.
+    """
+    if isBoardFile(inName):
+        with BoardReader(inName) as reader, open(outName, "w") as out:
+            writeText(out, reader.iterFaces())
+            return len(reader)
+    boards = readBoards(inName)
+    first = next(boards, None)
+    cells = len(first) if first is not None else len(CLASSIC)
+    size = math.isqrt(cells)
+    cubes = cubeSetFor(size, cells // size)
+    if cubes is None:
+        raise ValueError("no cube set has {} cubes".format(cells))
+    with BoardWriter(outName, size, cells // size, cubes) as writer:
+        if first is not None:
+            writer.writeFaces(first)
+            for faces in boards:
+                writer.writeFaces(faces)
+        return writer.getCount()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        print("converted {} boards".format(convert(sys.argv[1], sys.argv[2])))
+    else:
+        from doctest import testmod
+        testmod()
@@ -0,0 +1,367 @@
+"""
+Monte Carlo statistics about a cube set: how many words a random board
+holds, its best possible score, its longest word, and how often each
+lexicon word can be formed.
+
+Boards are rolled and solved in chunks on a process pool.  Each chunk
+is rolled in one go as a NumPy array (boardgen.generateBoards), always
+from the random stream RandomStream(seed).jumped(k) for chunk k, so a
+run gives the same answer however many workers it uses, and can be
+stopped and resumed from a checkpoint.  Requires NumPy.  Every statistic is kept as an
+exact histogram of small integers (or a count per lexicon word), so
+memory stays flat however many boards are sampled.
+
+Usage:
+    python boardstats.py -n 1000000 [-w WORKERS] [--seed S]
+                         [--checkpoint stats.json] [--cubes big]
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from collections import Counter
+from multiprocessing import Pool
+
+from bitsolver import BitSolver
+from boardgen import generateBoards
+from boggleengine import scoreWords
+from bogglecubes import CUBE_SETS, faceTable
+from brandom import RandomStream
+
+# 2: chunks are rolled by boardgen, so version 1 checkpoints cannot resume
+_VERSION = 2
+
+# two-sided 95% normal quantile
+Z95 = 1.959963984540054
+
+def wilsonInterval(successes, trials, z=Z95):
+    """
+    Returns the Wilson score interval (low, high) for a proportion.
+
+    >>> [round(x, 3) for x in wilsonInterval(50, 100)]
+    [0.404, 0.596]
+    """
+    if not trials:
+        return (0.0, 1.0)
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    spread = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return (max(0.0, centre - spread), min(1.0, centre + spread))
+
+
+class Histogram:
+    """A Histogram counts how often each integer value occurs.  Boards
+    have a few hundred distinct values at most, so it stays small.
+
+    >>> h = Histogram()
+    >>> for value in [3, 5, 5, 9]:
+    ...     h.add(value)
+    >>> h.getCount(), h.getMean(), h.percentile(50), h.getMax()
+    (4, 5.5, 5, 9)
+    >>> [round(x, 2) for x in h.meanInterval()]
+    [3.03, 7.97]
+    """
+
+    __slots__ = ['_counts']
+
+    def __init__(self, counts=None):
+        self._counts = Counter(counts or {})
+
+    def add(self, value, times=1):
+        self._counts[value] += times
+
+    def merge(self, other):
+        """Add the counts of another Histogram to this one."""
+        self._counts.update(other._counts)
+
+    def getCounts(self):
+        """Returns the dict mapping value to count."""
+        return self._counts
+
+    def getCount(self):
+        return sum(self._counts.values())
+
+    def getMean(self):
+        count = self.getCount()
+        return sum(v * c for v, c in self._counts.items()) / count if count else 0.0
+
+    def getVariance(self):
+        """Returns the sample variance."""
+        count = self.getCount()
+        if count < 2:
+            return 0.0
+        mean = self.getMean()
+        return sum(c * (v - mean) ** 2 for v, c in self._counts.items()) / (count - 1)
+
+    def getMax(self):
+        return max(self._counts) if self._counts else 0
+
+    def meanInterval(self, z=Z95):
+        """Returns the (low, high) confidence interval of the mean."""
+        count = self.getCount()
+        spread = z * math.sqrt(self.getVariance() / count) if count else 0.0
+        return (self.getMean() - spread, self.getMean() + spread)
+
+    def percentile(self, p):
+        """Returns the smallest value with at least p percent at or below it."""
+        target = self.getCount() * p / 100
+        seen = 0
+        for value in sorted(self._counts):
+            seen += self._counts[value]
+            if seen >= target:
+                return value
+        return 0
+
+    def toDict(self):
+        return {str(value): count for value, count in sorted(self._counts.items())}
+
+    @classmethod
+    def fromDict(cls, data):
+        return cls({int(value): count for value, count in data.items()})
+
+
+class BoardStats:
+    """BoardStats aggregates the solutions of many boards: histograms of
+    the number of words, the best possible score and the length of the
+    longest word, and the number of boards on which each word appears.
+    BoardStats from different workers are combined with merge.
+
+    >>> stats = BoardStats()
+    >>> stats.add(["CAT", "CATS", "SCAT"])
+    >>> stats.add([])
+    >>> stats.getBoards(), stats.getWordCounts().getMean(), stats.getScores().getMax()
+    (2, 1.5, 3)
+    >>> stats.getWordFrequency()["CAT"]
+    1
+    """
+
+    __slots__ = ['_boards', '_wordCounts', '_scores', '_longest', '_wordFrequency']
+
+    def __init__(self):
+        self._boards = 0
+        self._wordCounts = Histogram()
+        self._scores = Histogram()
+        self._longest = Histogram()
+        self._wordFrequency = Counter()
+
+    def add(self, words):
+        """Record the words (a collection of str) found on one board."""
+        self._boards += 1
+        self._wordCounts.add(len(words))
+        self._scores.add(scoreWords(words))
+        self._longest.add(max(map(len, words), default=0))
+        self._wordFrequency.update(words)
+
+    def merge(self, other):
+        self._boards += other._boards
+        self._wordCounts.merge(other._wordCounts)
+        self._scores.merge(other._scores)
+        self._longest.merge(other._longest)
+        self._wordFrequency.update(other._wordFrequency)
+
+    def getBoards(self):
+        return self._boards
+
+    def getWordCounts(self):
+        return self._wordCounts
+
+    def getScores(self):
+        return self._scores
+
+    def getLongest(self):
+        return self._longest
+
+    def getWordFrequency(self):
+        """Returns the Counter of boards each word was found on."""
+        return self._wordFrequency
+
+    def toDict(self):
+        return {"boards": self._boards, "wordCounts": self._wordCounts.toDict(),
+                "scores": self._scores.toDict(), "longest": self._longest.toDict(),
+                "wordFrequency": dict(self._wordFrequency)}
+
+    @classmethod
+    def fromDict(cls, data):
+        stats = cls()
+        stats._boards = data["boards"]
+        stats._wordCounts = Histogram.fromDict(data["wordCounts"])
+        stats._scores = Histogram.fromDict(data["scores"])
+        stats._longest = Histogram.fromDict(data["longest"])
+        stats._wordFrequency = Counter(data["wordFrequency"])
+        return stats
+
+    def report(self, topWords=10):
+        """Returns a summary, with 95% confidence intervals, as a string."""
+        lines = ["{} boards".format(self._boards)]
+        for name, histogram in [("words per board", self._wordCounts),
+                                ("max score", self._scores),
+                                ("longest word", self._longest)]:
+            low, high = histogram.meanInterval()
+            lines.append("{:16s} mean {:8.3f}  95% CI [{:.3f}, {:.3f}]  "
+                         "median {}  p99 {}  max {}".format(
+                             name, histogram.getMean(), low, high, histogram.percentile(50),
+                             histogram.percentile(99), histogram.getMax()))
+        lines.append("most common words (share of boards, 95% CI):")
+        for word, count in self._wordFrequency.most_common(topWords):
+            low, high = wilsonInterval(count, self._boards)
+            lines.append("  {:12s} {:7.3%}  [{:.3%}, {:.3%}]".format(
+                word, count / self._boards, low, high))
+        return "\n".join(lines)
+
+
+def _sampleChunk(seed, chunk, chunkSize, cubeSet):
+    """Pool task: roll and solve chunk number chunk; returns its BoardStats."""
+    cubes = CUBE_SETS[cubeSet]
+    size = math.isqrt(len(cubes))
+    solver = BitSolver(size, len(cubes) // size)
+    table = faceTable(cubes)
+    stats = BoardStats()
+    for codes in generateBoards(chunkSize, cubes, RandomStream(seed).jumped(chunk)).tolist():
+        stats.add(solver.solveSet([table[code] for code in codes]))
+    return stats
+
+def _sampleTask(task):
+    return _sampleChunk(*task)
+
+
+class Sampler:
+    """A Sampler runs (and resumes) one Monte Carlo study: boards rolled
+    from the cube set named cubeSet, in chunks of chunkSize, from the
+    random streams of seed.
+
+    >>> sampler = Sampler(seed=1, chunkSize=5)
+    >>> sampler.run(10, workers=1).getBoards()
+    10
+    >>> again = Sampler(seed=1, chunkSize=5)
+    >>> again.run(5, workers=1).getBoards(), again.run(5, workers=1).getBoards()
+    (5, 10)
+    >>> again.getStats().toDict() == sampler.getStats().toDict()
+    True
+    """
+
+    __slots__ = ['_seed', '_chunkSize', '_cubeSet', '_nextChunk', '_stats']
+
+    def __init__(self, seed=0, chunkSize=1000, cubeSet="classic"):
+        if cubeSet not in CUBE_SETS:
+            raise ValueError("unknown cube set {!r}".format(cubeSet))
+        self._seed = seed
+        self._chunkSize = chunkSize
+        self._cubeSet = cubeSet
+        self._nextChunk = 0
+        self._stats = BoardStats()
+
+    def getStats(self):
+        return self._stats
+
+    def getSeed(self):
+        return self._seed
+
+    def getChunkSize(self):
+        return self._chunkSize
+
+    def getCubeSet(self):
+        return self._cubeSet
+
+    def run(self, boards, workers=None, checkpoint=None, every=60.0, progress=None):
+        """
+        Sample boards more boards (rounded up to whole chunks) on workers
+        processes (default: one per core) and return the updated
+        BoardStats.  If checkpoint names a file, the state is saved there
+        at least every `every` seconds and at the end.  progress, if
+        given, is called with the BoardStats after each chunk.
+        """
+        chunks = -(-boards // self._chunkSize)
+        first = self._nextChunk
+        tasks = [(self._seed, chunk, self._chunkSize, self._cubeSet)
+                 for chunk in range(first, first + chunks)]
+        lastSave = time.perf_counter()
+        if workers == 1:
+            results = (_sampleChunk(*task) for task in tasks)
+            pool = None
+        else:
+            pool = Pool(workers)
+            # results come back in chunk order, so every chunk before
+            # _nextChunk is in the stats and a checkpoint is consistent
+            results = pool.imap(_sampleTask, tasks)
+        try:
+            for stats in results:
+                self._stats.merge(stats)
+                self._nextChunk += 1
+                if progress is not None:
+                    progress(self._stats)
+                if checkpoint and time.perf_counter() - lastSave >= every:
+                    self.save(checkpoint)
+                    lastSave = time.perf_counter()
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+            if checkpoint:
+                self.save(checkpoint)
+        return self._stats
+
+    def save(self, fileName):
+        """Write a checkpoint (JSON), replacing fileName in one step."""
+        data = {"version": _VERSION, "seed": self._seed, "chunkSize": self._chunkSize,
+                "cubeSet": self._cubeSet, "nextChunk": self._nextChunk,
+                "stats": self._stats.toDict()}
+        tmpName = "{}.{}.tmp".format(fileName, os.getpid())
+        with open(tmpName, "w") as f:
+            json.dump(data, f)
+        os.replace(tmpName, fileName)
+
+    @classmethod
+    def load(cls, fileName):
+        """Returns the Sampler saved in the checkpoint fileName."""
+        with open(fileName) as f:
+            data = json.load(f)
+        if data.get("version") != _VERSION:
+            raise ValueError("{} is not a compatible checkpoint".format(fileName))
+        sampler = cls(data["seed"], data["chunkSize"], data["cubeSet"])
+        sampler._nextChunk = data["nextChunk"]
+        sampler._stats = BoardStats.fromDict(data["stats"])
+        return sampler
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo statistics of random Boggle boards.")
+    parser.add_argument("-n", "--boards", type=int, default=100000, help="boards to sample")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("-s", "--seed", type=int, help="default 0")
+    parser.add_argument("-c", "--chunk-size", type=int, help="default 1000")
+    parser.add_argument("--cubes", choices=sorted(CUBE_SETS), help="default classic")
+    parser.add_argument("--checkpoint", help="save progress here; resume from it if it exists")
+    parser.add_argument("--every", type=float, default=60.0, help="seconds between checkpoints")
+    parser.add_argument("--top", type=int, default=10, help="most common words to list")
+    options = parser.parse_args(args)
+
+    if options.checkpoint and os.path.exists(options.checkpoint):
+        sampler = Sampler.load(options.checkpoint)
+        # a resumed run carries on the checkpoint's study; it cannot change it
+        for flag, given, saved in [("--seed", options.seed, sampler.getSeed()),
+                                   ("--chunk-size", options.chunk_size, sampler.getChunkSize()),
+                                   ("--cubes", options.cubes, sampler.getCubeSet())]:
+            if given is not None and given != saved:
+                parser.error("{} {} conflicts with {} {} in the checkpoint {}".format(
+                    flag, given, flag, saved, options.checkpoint))
+        print("resuming after {} boards".format(sampler.getStats().getBoards()), file=sys.stderr)
+    else:
+        sampler = Sampler(0 if options.seed is None else options.seed,
+                          options.chunk_size or 1000, options.cubes or "classic")
+    start = time.perf_counter()
+    before = sampler.getStats().getBoards()
+    stats = sampler.run(options.boards, options.workers, options.checkpoint, options.every)
+    elapsed = time.perf_counter() - start
+    print(stats.report(options.top))
+    print("{:.0f} boards/sec".format((stats.getBoards() - before) / elapsed), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main()
+    else:
+        from doctest import testmod
+        testmod()
@@ -6,33 +6,34 @@ from graphics import *
 from brandom import *
 from boggleletter import BoggleLetter
 from board import Board
+from bogglecubes import CLASSIC, CUBE_SETS, FACES_PER_CUBE, cubeSetFor, rollCubes
 
 class BoggleBoard(Board):
     """Boggle Board class implements the functionality of a Boggle board.
     It inherits from the Board class and extends it by creating a grid
     of BoggleLetters, shaken appropriately to randomize play."""
 
-    __slots__ = ['_grid', "_cubes"]
-
-    def __init__(self, win):
-        super().__init__(win, rows=4, cols=4)
-
-        self._cubes =  [[ "A", "A", "C", "I", "O", "T" ],
-                        [ "T", "Y", "A", "B", "I", "L" ],
-                        [ "J", "M", "O", "Qu", "A", "B"],
-                        [ "A", "C", "D", "E", "M", "P" ],
-                        [ "A", "C", "E", "L", "S", "R" ],
-                        [ "A", "D", "E", "N", "V", "Z" ],
-                        [ "A", "H", "M", "O", "R", "S" ],
-                        [ "B", "F", "I", "O", "R", "X" ],
-                        [ "D", "E", "N", "O", "S", "W" ],
-                        [ "D", "K", "N", "O", "T", "U" ],
-                        [ "E", "E", "F", "H", "I", "Y" ],
-                        [ "E", "G", "I", "N", "T", "V" ],
-                        [ "E", "G", "K", "L", "U", "Y" ],
-                        [ "E", "H", "I", "N", "P", "S" ],
-                        [ "E", "L", "P", "S", "T", "U" ],
-                        [ "G", "I", "L", "R", "U", "W" ]]
+    __slots__ = ['_grid', "_cubes", "_codes", "_shakeHandler", "_rerollHandler"]
+
+    def __init__(self, win, rows=4, cols=4, cubes=None):
+        """
+        Construct a rows x cols board in win, rolled from cubes (a tuple
+        of cubes, one per cell).  By default the cube set that fills the
+        board is used: Boggle for 4x4, Big Boggle for 5x5 and Super Big
+        Boggle for 6x6.  board.windowSize gives the window size needed.
+        """
+        if cubes is None:
+            name = cubeSetFor(rows, cols)
+            if name is None:
+                raise ValueError("no cube set for a {}x{} board; pass cubes".format(rows, cols))
+            cubes = CUBE_SETS[name]
+        if len(cubes) != rows * cols:
+            raise ValueError("{} cubes cannot fill a {}x{} board".format(len(cubes), rows, cols))
+        super().__init__(win, rows=rows, cols=cols)
+
+        self._cubes = [list(cube) for cube in cubes]
+        self._shakeHandler = None
+        self._rerollHandler = None
 
         # set up an empty list
         self._grid = []
@@ -63,6 +64,14 @@ class BoggleBoard(Board):
         >>> board.getBoggleLetterAtPoint(pointIn_1_2) == board._grid[1][2]
         True
         >>> win.close()
+        >>> from board import windowSize
+        >>> win = GraphWin("Super Big Boggle", *windowSize(6, 6))
+        >>> board = BoggleBoard(win, 6, 6)
+        >>> board.getBoggleLetterAtPoint(Point(345, 345)) == board._grid[5][5]
+        True
+        >>> board.getBoggleLetterAtPoint(Point(355, 345)) is None
+        True
+        >>> win.close()
         """
 
         # return BoggleLetter object at given location on the screen
@@ -76,66 +85,184 @@ class BoggleBoard(Board):
         else:
             return None    
 
+    def getCubes(self):
+        """Returns the cubes (lists of faces) the board is rolled from."""
+        return self._cubes
+
+    def getBoggleLetter(self, col, row):
+        """
+        Return the BoggleLetter at grid position (col, row).
+        """
+        return self._grid[col][row]
+
     def resetColors(self):
         """
         "Unclicks" all boggle letters on the board without changing any
         other attributes.  (Change letter colors back to default values.)
         """
-        for col in range(self._cols): #looking in the columns
-            for row in range(self._rows): #looking in the rows
-                self._grid[col][row].setFillColor("white")
-                self._grid[col][row].setTextColor("black")
-                # reset squares by filling the rectangle with white
+        # batch the changes so the window is only updated once
+        with self._win.batch():
+            for col in range(self._cols): #looking in the columns
+                for row in range(self._rows): #looking in the rows
+                    self._grid[col][row].setFillColor("white")
+                    self._grid[col][row].setTextColor("black")
+                    # reset squares by filling the rectangle with white
 
-    def reset(self):
+    def reset(self, rng=None):
         """
         Clears the boggle board by clearing letters and colors,
         clears all text areas (right, lower, upper) on board
-        and resets the letters on board by calling shakeCubes.
+        and resets the letters on board by calling shakeCubes
+        (with rng, if given).
         """
-        # reset letter and color
-        for col in range(self._cols):
-            for row in range(self._rows):
-                self._grid[col][row].setLetter("")
-                self._grid[col][row].setFillColor("white")
-        # clear all text areas 
-        self.setStringToLowerText("")
-        self.setStringToTextArea("")
-        self.setStringToUpperText("")
-        # reset letters on board
-        self.shakeCubes()
+        with self._win.batch():
+            # reset letter and color
+            for col in range(self._cols):
+                for row in range(self._rows):
+                    self._grid[col][row].setLetter("")
+                    self._grid[col][row].setFillColor("white")
+            # clear all text areas 
+            self.setStringToLowerText("")
+            self.setStringToTextArea("")
+            self.setStringToUpperText("")
+            # reset letters on board
+            self.shakeCubes(rng)
 
-    def shakeCubes(self):
+    def shakeCubes(self, rng=None):
         """
         Shakes the boggle board and sets letters as described by the handout.
+        Uses the global random generator unless rng (eg a RandomStream)
+        is given; the letters are the same as rollCubes(CLASSIC, rng).
+
+        >>> win = GraphWin("Boggle", 400, 400)
+        >>> board = BoggleBoard(win)
+        >>> board.shakeCubes(RandomStream(3).jumped(7))
+        >>> board.getFaces() == rollCubes(CLASSIC, RandomStream(3).jumped(7))
+        True
+        >>> win.close()
         """
-        # shuffle cubes
-        shuffledCubes = shuffled(self._cubes)
+        # shuffle cubes (by index, so each cell's cell code is known)
+        shuffledCubes = shuffled(list(range(len(self._cubes))), rng)
 
         # iterate over squares to shuffle the side of the cube facing up
-        for rowGrid in range(self._rows):
-            for colGrid in range(self._cols):
-                # use randomInt to randomly choose the face-up side of the cube
-                self._grid[colGrid][rowGrid].setLetter(shuffledCubes[0][randomInt(0,5)])
-                # slice list of lists shuffled cubes to systematically assign a list to 
-                # each square in the grid
-                shuffledCubes = shuffledCubes[1:]
-                
+        codes = []
+        with self._win.batch():
+            # walk through the shuffled cubes, assigning one to each
+            # square in the grid
+            nextCube = iter(shuffledCubes)
+            for rowGrid in range(self._rows):
+                for colGrid in range(self._cols):
+                    # use randomInt to randomly choose the face-up side of the cube
+                    cube = next(nextCube)
+                    face = randomInt(0,FACES_PER_CUBE-1,rng)
+                    self._grid[colGrid][rowGrid].setLetter(self._cubes[cube][face])
+                    codes.append(cube * FACES_PER_CUBE + face)
+        self._codes = bytes(codes)
+        if self._shakeHandler is not None:
+            self._shakeHandler(self.getFaces())
+
+    def setShakeHandler(self, handler):
+        """
+        Calls handler(faces) with the new letters (list of str, row by
+        row) after every shake, eg to start solving the new board.
+        None turns it off.
+
+        >>> win = GraphWin("Boggle", 400, 400)
+        >>> board = BoggleBoard(win)
+        >>> shaken = []
+        >>> board.setShakeHandler(shaken.append)
+        >>> board.reset()
+        >>> shaken == [board.getFaces()]
+        True
+        >>> win.close()
+        """
+        self._shakeHandler = handler
+
+    def rerollCube(self, col, row, rng=None):
+        """
+        Re-rolls only the cube at grid position (col, row): it stays in
+        its cell and lands on a random face (possibly the same one).
+        Returns the new face.  Uses the global random generator unless
+        rng is given.
+
+        >>> win = GraphWin("Boggle", 400, 400)
+        >>> board = BoggleBoard(win)
+        >>> before = board.getFaces()
+        >>> face = board.rerollCube(1, 2, RandomStream(5))
+        >>> after = board.getFaces()
+        >>> after[2 * 4 + 1] == face, after[:9] == before[:9], after[10:] == before[10:]
+        (True, True, True)
+        >>> from bogglecubes import faceTable
+        >>> [faceTable()[code] for code in board.getCodes()] == after
+        True
+        >>> win.close()
+        """
+        cell = row * self._cols + col
+        cube = self._codes[cell] // FACES_PER_CUBE
+        face = randomInt(0, FACES_PER_CUBE - 1, rng)
+        letter = self._cubes[cube][face]
+        with self._win.batch():
+            self._grid[col][row].setLetter(letter)
+        codes = bytearray(self._codes)
+        codes[cell] = cube * FACES_PER_CUBE + face
+        self._codes = bytes(codes)
+        if self._rerollHandler is not None:
+            self._rerollHandler(cell, letter)
+        return letter
+
+    def setRerollHandler(self, handler):
+        """
+        Calls handler(cell, face) after every rerollCube, with the cell
+        (row * cols + col) and its new face, eg to update an
+        IncrementalSolver.  None turns it off.
+
+        >>> win = GraphWin("Boggle", 400, 400)
+        >>> board = BoggleBoard(win)
+        >>> from bitsolver import BitSolver, IncrementalSolver
+        >>> solver = IncrementalSolver()
+        >>> solver.load(board.getFaces())
+        True
+        >>> board.setRerollHandler(lambda cell, face: solver.setFaces({cell: face}))
+        >>> for cell in range(16):
+        ...     _ = board.rerollCube(cell % 4, cell // 4)
+        >>> set(solver.getWords()) == BitSolver().solveSet(board.getFaces())
+        True
+        >>> win.close()
+        """
+        self._rerollHandler = handler
+
+
+
+    def getFaces(self):
+        """
+        Returns the letters showing on the board as a list of strings,
+        read row by row (the order used by bogglesolver).
+        """
+        return [self._grid[col][row].getLetter()
+                for row in range(self._rows) for col in range(self._cols)]
 
+    def getCodes(self):
+        """
+        Returns the board's cell codes (cube * 6 + face), one byte per
+        cell read row by row: the record boardio writes for this board.
+
+        >>> win = GraphWin("Boggle", 400, 400)
+        >>> board = BoggleBoard(win)
+        >>> from bogglecubes import faceTable
+        >>> [faceTable()[code] for code in board.getCodes()] == board.getFaces()
+        True
+        >>> win.close()
+        """
+        return self._codes
 
     def __str__(self):
         """
         Returns a string representation of this BoggleBoard
         """
-        board = ''
-        for r in range(self._rows):
-            for c in range(self._cols):
-                boggleLetter = self._grid[c][r]
-                color = boggleLetter.getTextColor()
-                letter = boggleLetter.getLetter()
-                board += '[{}:{}] '.format(letter,color)
-            board += '\n'
-        return board
+        return ''.join(
+            ''.join('[{}:{}] '.format(self._grid[c][r].getLetter(), self._grid[c][r].getTextColor())
+                    for c in range(self._cols)) + '\n'
+            for r in range(self._rows))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,171 @@
+"""
+Defines the letter cubes used to build Boggle boards.
+"""
+
+from brandom import randomInt, shuffled
+
+# the 16 cubes of the classic 4x4 game; each cube has six faces
+CLASSIC = (( "A", "A", "C", "I", "O", "T" ),
+           ( "T", "Y", "A", "B", "I", "L" ),
+           ( "J", "M", "O", "Qu", "A", "B"),
+           ( "A", "C", "D", "E", "M", "P" ),
+           ( "A", "C", "E", "L", "S", "R" ),
+           ( "A", "D", "E", "N", "V", "Z" ),
+           ( "A", "H", "M", "O", "R", "S" ),
+           ( "B", "F", "I", "O", "R", "X" ),
+           ( "D", "E", "N", "O", "S", "W" ),
+           ( "D", "K", "N", "O", "T", "U" ),
+           ( "E", "E", "F", "H", "I", "Y" ),
+           ( "E", "G", "I", "N", "T", "V" ),
+           ( "E", "G", "K", "L", "U", "Y" ),
+           ( "E", "H", "I", "N", "P", "S" ),
+           ( "E", "L", "P", "S", "T", "U" ),
+           ( "G", "I", "L", "R", "U", "W" ))
+
+# the 25 cubes of Big Boggle (5x5)
+BIG = (( "A", "A", "A", "F", "R", "S" ),
+       ( "A", "A", "E", "E", "E", "E" ),
+       ( "A", "A", "F", "I", "R", "S" ),
+       ( "A", "D", "E", "N", "N", "N" ),
+       ( "A", "E", "E", "E", "E", "M" ),
+       ( "A", "E", "E", "G", "M", "U" ),
+       ( "A", "E", "G", "M", "N", "N" ),
+       ( "A", "F", "I", "R", "S", "Y" ),
+       ( "B", "J", "K", "Qu", "X", "Z"),
+       ( "C", "C", "E", "N", "S", "T" ),
+       ( "C", "E", "I", "I", "L", "T" ),
+       ( "C", "E", "I", "L", "P", "T" ),
+       ( "C", "E", "I", "P", "S", "T" ),
+       ( "D", "D", "H", "N", "O", "T" ),
+       ( "D", "H", "H", "L", "O", "R" ),
+       ( "D", "H", "L", "N", "O", "R" ),
+       ( "D", "H", "L", "N", "O", "R" ),
+       ( "E", "I", "I", "I", "T", "T" ),
+       ( "E", "M", "O", "T", "T", "T" ),
+       ( "E", "N", "S", "S", "S", "U" ),
+       ( "F", "I", "P", "R", "S", "Y" ),
+       ( "G", "O", "R", "R", "V", "W" ),
+       ( "I", "P", "R", "R", "R", "Y" ),
+       ( "N", "O", "O", "T", "U", "W" ),
+       ( "O", "O", "O", "T", "T", "U" ))
+
+# the 36 cubes of Super Big Boggle (6x6), with its two-letter faces; the
+# blank faces of the real set are replaced by common letters
+SUPER_BIG = (( "A", "A", "A", "F", "R", "S" ),
+             ( "A", "A", "E", "E", "E", "E" ),
+             ( "A", "A", "E", "E", "O", "O" ),
+             ( "A", "A", "F", "I", "R", "S" ),
+             ( "A", "B", "D", "E", "I", "O" ),
+             ( "A", "D", "E", "N", "N", "N" ),
+             ( "A", "E", "E", "E", "E", "M" ),
+             ( "A", "E", "E", "G", "M", "U" ),
+             ( "A", "E", "G", "M", "N", "N" ),
+             ( "A", "E", "I", "L", "M", "N" ),
+             ( "A", "E", "I", "N", "O", "U" ),
+             ( "A", "F", "I", "R", "S", "Y" ),
+             ( "An", "Er", "He", "In", "Qu", "Th"),
+             ( "B", "B", "J", "K", "X", "Z" ),
+             ( "C", "C", "E", "N", "S", "T" ),
+             ( "C", "D", "D", "L", "N", "N" ),
+             ( "C", "E", "I", "I", "T", "T" ),
+             ( "C", "E", "I", "P", "S", "T" ),
+             ( "C", "F", "G", "N", "U", "Y" ),
+             ( "D", "D", "H", "N", "O", "T" ),
+             ( "D", "H", "H", "L", "O", "R" ),
+             ( "D", "H", "H", "N", "O", "W" ),
+             ( "D", "H", "L", "N", "O", "R" ),
+             ( "E", "H", "I", "L", "R", "S" ),
+             ( "E", "I", "I", "L", "S", "T" ),
+             ( "E", "I", "L", "P", "S", "T" ),
+             ( "E", "I", "O", "N", "S", "T" ),
+             ( "E", "M", "T", "T", "T", "O" ),
+             ( "E", "N", "S", "S", "S", "U" ),
+             ( "G", "O", "R", "R", "V", "W" ),
+             ( "H", "I", "R", "S", "T", "V" ),
+             ( "H", "O", "P", "R", "S", "T" ),
+             ( "I", "P", "R", "S", "Y", "Y" ),
+             ( "J", "K", "Qu", "W", "X", "Z"),
+             ( "N", "O", "O", "T", "U", "W" ),
+             ( "O", "O", "O", "T", "T", "U" ))
+
+# every cube has this many faces; a cell code is cube * FACES_PER_CUBE + face
+FACES_PER_CUBE = 6
+
+# cube sets by name, as stored in board files
+CUBE_SETS = {"classic": CLASSIC, "big": BIG, "superbig": SUPER_BIG}
+
+def cubeSetFor(rows, cols):
+    """
+    Returns the name of the cube set that fills a rows x cols board, or
+    None if there is none.
+
+    >>> cubeSetFor(4, 4), cubeSetFor(5, 5), cubeSetFor(6, 6), cubeSetFor(3, 3)
+    ('classic', 'big', 'superbig', None)
+    """
+    for name, cubes in CUBE_SETS.items():
+        if len(cubes) == rows * cols:
+            return name
+    return None
+
+def faceTable(cubes=CLASSIC):
+    """
+    Returns the list of faces indexed by cell code.
+
+    >>> faceTable()[2 * 6 + 3]
+    'Qu'
+    """
+    return [face for cube in cubes for face in cube]
+
+def rollCubes(cubes=CLASSIC, rng=None):
+    """
+    Returns the faces (row by row) of a board made by shaking cubes, the
+    same way BoggleBoard.shakeCubes does.  With a RandomStream, board k
+    of a reproducible series is rollCubes(cubes, stream.jumped(k)).
+
+    >>> from brandom import RandomStream
+    >>> rollCubes(rng=RandomStream(1).jumped(5)) == rollCubes(rng=RandomStream(1).jumped(5))
+    True
+    >>> len(rollCubes())
+    16
+    """
+    return [cube[randomInt(0, len(cube) - 1, rng)] for cube in shuffled(list(cubes), rng)]
+
+def formatFaces(faces):
+    """
+    Returns the one-line text form of a board: its faces (list of str,
+    row by row) run together, eg "AQuEB".  Only the first letter of a
+    face is uppercase, so multi-letter faces can be read back.
+
+    >>> formatFaces(["A", "QU", "E", "b"])
+    'AQuEB'
+    """
+    return "".join(face.capitalize() for face in faces)
+
+def parseFaces(text):
+    """
+    Returns the list of faces in the text form of a board.  An uppercase
+    letter starts a new face and lowercase letters extend it; a "U"
+    straight after "Q" is also read as part of a "Qu" face, so boards
+    written all in uppercase still parse.
+
+    >>> parseFaces("AQuEB")
+    ['A', 'Qu', 'E', 'B']
+    >>> parseFaces("AQUEB")
+    ['A', 'Qu', 'E', 'B']
+    >>> parseFaces("ThErS")
+    ['Th', 'Er', 'S']
+    """
+    faces = []
+    for ch in text.strip():
+        if not ch.isalpha():
+            raise ValueError("not a board: {!r}".format(text))
+        if faces and (ch.islower() or (ch == "U" and faces[-1] == "Q")):
+            faces[-1] += ch.lower()
+        else:
+            faces.append(ch.upper())
+    return faces
+
+
+if __name__ == "__main__":
+    from doctest import testmod
+    testmod()
@@ -0,0 +1,455 @@
+"""
+Implements the rules of one game of Boggle with no graphics, so games
+can be simulated and load-tested without a display.  BoggleGame drives
+a BoggleEngine and draws the events it returns.
+"""
+
+import math
+import random
+import time
+from collections import Counter
+
+from bogglesolver import neighbours
+from lexicon import getLexicon
+
+# kinds of event returned by BoggleEngine.click
+SELECT = "select"   # (SELECT, cell): cell starts a new path
+EXTEND = "extend"   # (EXTEND, cell, previous): cell extends the path
+SUBMIT = "submit"   # (SUBMIT, word, accepted): the path was submitted
+CLEAR = "clear"     # (CLEAR, cell): the path was abandoned
+
+# points for a word of each length (index), as in bogglegameEC; 8+ score 11
+_POINTS = (0, 0, 0, 1, 1, 2, 3, 5, 11)
+
+# the most steps BoggleEngine.findPath searches before giving up
+_MAX_STEPS = 20000
+
+def wordScore(word):
+    """
+    Returns the points scored by word.
+
+    >>> [wordScore(w) for w in ["AT", "CAT", "CATS", "QUILT", "QUITES", "ABSOLUTELY"]]
+    [0, 1, 1, 2, 3, 11]
+    """
+    return _POINTS[min(len(word), 8)]
+
+def scoreWords(words):
+    """Returns the total points scored by words."""
+    return sum(_POINTS[min(len(word), 8)] for word in words)
+
+class BoggleEngine:
+    """A BoggleEngine holds the state of a game in progress:
+       *  _faces: the letters on the board (list of str, row by row)
+       *  _path: the cells (ints, row * cols + col) selected so far
+       *  _visited: the same cells as a bitmask
+       *  _nodes: the lexicon trie node reached after each cell of the
+          path, or -1 once the path spells no word's prefix
+       *  _foundWords: the words found so far, in order
+    and applies one (col, row) click at a time, following the same
+    rules as the graphical game.  Each click steps the trie by one face,
+    so checking the path against the lexicon costs nothing extra.
+
+    >>> engine = BoggleEngine(["C", "A", "T", "S"], rows=2, cols=2)
+    >>> engine.click(0, 0), engine.click(1, 0), engine.click(0, 1)
+    (('select', 0), ('extend', 1, 0), ('extend', 2, 1))
+    >>> engine.getWord(), engine.isPrefix(), engine.countCompletions() > 1
+    ('CAT', True, True)
+    >>> engine.click(0, 1)
+    ('submit', 'CAT', True)
+    >>> [engine.click(*p) for p in [(0, 0), (1, 0), (0, 1), (0, 1)]][-1]
+    ('submit', 'CAT', False)
+    >>> engine.click(1, 1), engine.click(1, 1)
+    (('select', 3), ('submit', 'S', False))
+    >>> engine.click(0, 0), engine.click(1, 0), engine.click(0, 0)
+    (('select', 0), ('extend', 1, 0), ('clear', 0))
+    >>> engine.getFoundWords()
+    ['CAT']
+    >>> engine.click(0, 1), engine.click(0, 0), engine.isPrefix(), engine.countCompletions()
+    (('select', 2), ('extend', 0, 2), False, 0)
+    """
+
+    __slots__ = ['_rows', '_cols', '_adjacent', '_lexicon', '_trie', '_faces', '_bits',
+                 '_upper', '_letters', '_path', '_visited', '_nodes', '_foundWords']
+
+    def __init__(self, faces, rows=4, cols=4, lexicon=None):
+        """
+        Start a game on a rows x cols board showing faces.  Uses the
+        shared lexicon unless another Lexicon is given.
+        """
+        self._rows = rows
+        self._cols = cols
+        self._adjacent = [sum(1 << other for other in cells)
+                          for cells in neighbours(rows, cols)]
+        self._lexicon = lexicon if lexicon is not None else getLexicon()
+        self._trie = self._lexicon.getNodes()
+        self.reset(faces)
+
+    def reset(self, faces):
+        """Start a new game on a board showing faces (list of str)."""
+        if len(faces) != self._rows * self._cols:
+            raise ValueError("expected {} faces, got {}".format(self._rows * self._cols, len(faces)))
+        self._faces = list(faces)
+        # the trie bit of each letter on each face, eg "QU" -> (Q bit, U bit)
+        self._bits = [tuple(1 << (ord(ch) - 65) if ch.isalpha() and ch.isascii() else 0
+                            for ch in face.upper()) for face in faces]
+        # for typed words: the faces in upper case, and how often each
+        # letter shows on the board
+        self._upper = [face.upper() for face in faces]
+        self._letters = Counter("".join(self._upper))
+        self._path = []
+        self._visited = 0
+        self._nodes = []
+        self._foundWords = []
+
+    def setFace(self, cell, face):
+        """
+        Changes the face at cell (eg after its cube is re-rolled) without
+        starting a new game: the words found so far are kept, and any
+        path in progress is abandoned.
+
+        >>> engine = BoggleEngine(["C", "A", "T", "S"], rows=2, cols=2)
+        >>> engine.submitWord("cast")[2]
+        True
+        >>> engine.setFace(3, "R")
+        >>> engine.submitWord("cart")[2], engine.submitWord("scat")[3], engine.getFoundWords()
+        (True, None, ['CAST', 'CART'])
+        """
+        old = self._upper[cell]
+        self._faces[cell] = face
+        self._bits[cell] = tuple(1 << (ord(ch) - 65) if ch.isalpha() and ch.isascii() else 0
+                                 for ch in face.upper())
+        self._upper[cell] = face.upper()
+        self._letters.subtract(old)
+        self._letters.update(face.upper())
+        self._path = []
+        self._visited = 0
+        self._nodes = []
+
+    def getRows(self):
+        return self._rows
+
+    def getCols(self):
+        return self._cols
+
+    def getFaces(self):
+        return self._faces
+
+    def getPath(self):
+        """Returns the list of cells selected so far."""
+        return self._path
+
+    def getWord(self):
+        """Returns the letters along the current path (str)."""
+        faces = self._faces
+        return "".join([faces[cell] for cell in self._path])
+
+    def getNode(self):
+        """
+        Returns the lexicon trie node spelled by the current path: the
+        root if the path is empty, -1 if no word starts that way.
+        """
+        return self._nodes[-1] if self._nodes else 0
+
+    def isPrefix(self):
+        """Returns True if some word starts with the current path."""
+        return self.getNode() >= 0
+
+    def countCompletions(self):
+        """
+        Returns the number of lexicon words that start with the current
+        path (0 once it is a dead end).  The words need not all fit on
+        the board.
+        """
+        return self._lexicon.countCompletions(self.getNode())
+
+    def getFoundWords(self):
+        return self._foundWords
+
+    def getCell(self, col, row):
+        """Converts a (col, row) grid position to a cell number."""
+        return row * self._cols + col
+
+    def getPosition(self, cell):
+        """Converts a cell number to a (col, row) grid position."""
+        return (cell % self._cols, cell // self._cols)
+
+    def __step(self, node, cell):
+        """Returns the trie node reached from node by the face at cell."""
+        if node >= 0:
+            trie = self._trie
+            for bit in self._bits[cell]:
+                mask = trie[node]
+                if not mask & bit:
+                    return -1
+                node = trie[node + 1] + 2 * (mask & (bit - 1)).bit_count()
+        return node
+
+    def click(self, col, row):
+        """
+        Applies a click on the letter at (col, row) and returns the
+        resulting event (see the constants at the top of this module):
+        the first click selects a letter, a click on an adjacent unused
+        letter extends the path, a second click on the last letter
+        submits the word, and any other click clears the path.
+        """
+        if not (0 <= col < self._cols and 0 <= row < self._rows):
+            raise ValueError("({}, {}) is not on the board".format(col, row))
+        cell = row * self._cols + col
+        bit = 1 << cell
+        path = self._path
+
+        if not path:
+            path.append(cell)
+            self._visited = bit
+            self._nodes = [self.__step(0, cell)]
+            return (SELECT, cell)
+
+        last = path[-1]
+        if self._adjacent[last] & bit and not self._visited & bit:
+            path.append(cell)
+            self._visited |= bit
+            self._nodes.append(self.__step(self._nodes[-1], cell))
+            return (EXTEND, cell, last)
+
+        if cell == last:
+            word = self.getWord()
+            accepted = self.__accept(word, self._nodes[-1])
+            self._path = []
+            self._visited = 0
+            self._nodes = []
+            return (SUBMIT, word, accepted)
+
+        self._path = []
+        self._visited = 0
+        self._nodes = []
+        return (CLEAR, cell)
+
+    def __accept(self, word, node):
+        """
+        Adds word, spelled out to trie node, to the found words if it is
+        a word not found before.  Returns True if it was added.
+        """
+        accepted = self._lexicon.isWord(node) and word not in self._foundWords
+        if accepted:
+            self._foundWords.append(word)
+        return accepted
+
+    def findPath(self, word, maxSteps=_MAX_STEPS):
+        """
+        Returns the cells of a path of adjacent letters, each used once,
+        that spells word (str, any case), or None if there is none.  A
+        face of several letters, eg "Qu", must match all of them.
+
+        The cells that could start each remaining part of the word are
+        worked out first, from the end of the word back (ignoring the
+        no-reuse rule), so the search only ever steps to cells from
+        which the word can still be finished.  While a long part of the
+        word remains, the search also skips any region of unused cells
+        that is too small to spell the rest, or has more dead ends than
+        can be left out, so boards with many copies of a letter do not
+        make it wander.  Whether a path exists is still a hard problem in
+        general, so the search gives up after maxSteps steps (None: no
+        limit), raising RuntimeError rather than reporting a miss; only
+        contrived words, far longer than any in the lexicon, on boards of
+        one letter over and over come near the default.
+
+        >>> engine = BoggleEngine(["Qu", "I", "T", "E"], rows=2, cols=2)
+        >>> engine.findPath("quite"), engine.findPath("QIT"), engine.findPath("TITE")
+        ([0, 1, 2, 3], None, None)
+        >>> engine = BoggleEngine(["E"] * 35 + ["S"], rows=6, cols=6)
+        >>> len(engine.findPath("E" * 35 + "S")), engine.findPath("E" * 36)
+        (36, None)
+
+        Thirty E's, three of them in corners with a single E beside
+        them, so no path uses them all:
+
+        >>> faces = ["E"] * 36
+        >>> for cell in [1, 7, 4, 10, 25, 31]:
+        ...     faces[cell] = "X"
+        >>> engine = BoggleEngine(faces, rows=6, cols=6)
+        >>> len(engine.findPath("E" * 29)), engine.findPath("E" * 30)
+        (29, None)
+        >>> engine.findPath("E" * 30, maxSteps=10)
+        Traceback (most recent call last):
+        ...
+        RuntimeError: gave up finding a path for EEEEEEEEEEEEEEEEEEEEEEEEEEEEEE after 10 steps
+        """
+        word = word.upper()
+        n = len(word)
+        # quick rejection: the board must show every letter often enough
+        if not n or Counter(word) - self._letters:
+            return None
+        faces = self._upper
+        adjacent = self._adjacent
+        # match[i]: the cells whose face spells word from position i
+        match = [0] * n
+        for cell, face in enumerate(faces):
+            if face:
+                i = word.find(face)
+                while i >= 0:
+                    match[i] |= 1 << cell
+                    i = word.find(face, i + 1)
+        # ok[i]: the cells that can spell all of word[i:], ignoring reuse
+        ok = [0] * (n + 1)
+        for i in range(n - 1, -1, -1):
+            cells = match[i]
+            while cells:
+                low = cells & -cells
+                cells ^= low
+                cell = low.bit_length() - 1
+                end = i + len(faces[cell])
+                if end == n or adjacent[cell] & ok[end]:
+                    ok[i] |= low
+        # later[i]: the cells that could spell some part of word[i:]
+        later = [0] * (n + 1)
+        for i in range(n - 1, -1, -1):
+            later[i] = later[i + 1] | ok[i]
+        # the cells showing faces of more than one letter, by extra letters
+        longer = {}
+        for cell, face in enumerate(faces):
+            if len(face) > 1:
+                longer[len(face) - 1] = longer.get(len(face) - 1, 0) | 1 << cell
+
+        def room(cells):
+            # the letters the faces of cells can spell between them
+            return cells.bit_count() + sum(extra * (cells & faceCells).bit_count()
+                                           for extra, faceCells in longer.items())
+
+        def viable(cell, visited, end):
+            # the next cells from which word[end:] might still be spelled.
+            # The unused cells that could spell part of it fall into
+            # regions joined only through cell; a path cannot come back
+            # through cell, so it must fit in one region.  A region is
+            # ruled out if it cannot hold the rest of the word, or has
+            # more dead ends than can be left out: a path has only one
+            # far end, so every other cell with a single neighbour must
+            # be skipped.
+            usable = later[end] & ~visited
+            starts = adjacent[cell] & ok[end] & ~visited
+            result = 0
+            left = adjacent[cell] & usable
+            while left:
+                region = flood(left & -left, usable)
+                left &= ~region
+                spare = room(region) - (n - end)
+                if spare < 0:
+                    continue
+                within = region | 1 << cell
+                ends = 0
+                cells = region
+                while cells and ends <= spare + 1:
+                    low = cells & -cells
+                    cells ^= low
+                    if (adjacent[low.bit_length() - 1] & within).bit_count() < 2:
+                        ends += 1
+                if ends <= spare + 1 :
+                    result |= starts & region
+            return result
+
+        def flood(seed, cells):
+            # the cells of cells joined to seed
+            region = seed
+            frontier = seed
+            while frontier:
+                grow = 0
+                while frontier:
+                    low = frontier & -frontier
+                    frontier ^= low
+                    grow |= adjacent[low.bit_length() - 1]
+                frontier = grow & cells & ~region
+                region |= frontier
+            return region
+
+        path = []
+        # (cell, visited) pairs that lead nowhere; visited fixes how much
+        # of the word is spelled, so the pair is the whole search state.
+        # It holds at most one entry per step, so the step limit bounds it.
+        failed = set()
+        steps = [math.inf if maxSteps is None else maxSteps]
+
+        def extend(i, cell, visited):
+            steps[0] -= 1
+            if steps[0] < 0:
+                raise RuntimeError("gave up finding a path for {} after {} steps".format(word, maxSteps))
+            path.append(cell)
+            end = i + len(faces[cell])
+            if end == n:
+                return True
+            if (cell, visited) not in failed:
+                # short remainders are quicker to search than to rule out
+                if n - end >= 4:
+                    free = viable(cell, visited, end)
+                else:
+                    free = adjacent[cell] & ok[end] & ~visited
+                while free:
+                    low = free & -free
+                    free ^= low
+                    if extend(end, low.bit_length() - 1, visited | low):
+                        return True
+                failed.add((cell, visited))
+            path.pop()
+            return False
+
+        starts = ok[0]
+        while starts:
+            low = starts & -starts
+            starts ^= low
+            if extend(0, low.bit_length() - 1, low):
+                return path
+        return None
+
+    def submitWord(self, word):
+        """
+        Submits a typed word (str, any case) as if its path had been
+        clicked, abandoning any path in progress.  Returns the event
+        (SUBMIT, word, accepted, path): word is spelled from the board's
+        faces (eg "QuIT") and path is the list of cells used, or None
+        (and accepted False) if it is not a word or not on the board.
+
+        >>> engine = BoggleEngine(["C", "A", "T", "S"], rows=2, cols=2)
+        >>> engine.submitWord("scat"), engine.submitWord("CAST")
+        (('submit', 'SCAT', True, [3, 0, 1, 2]), ('submit', 'CAST', True, [0, 1, 3, 2]))
+        >>> engine.submitWord("scat"), engine.submitWord("TACT")
+        (('submit', 'SCAT', False, [3, 0, 1, 2]), ('submit', 'TACT', False, None))
+        >>> engine.click(0, 0), engine.click(1, 0), engine.click(0, 1), engine.click(0, 1)
+        (('select', 0), ('extend', 1, 0), ('extend', 2, 1), ('submit', 'CAT', True))
+        >>> engine.getFoundWords()
+        ['SCAT', 'CAST', 'CAT']
+        """
+        self._path = []
+        self._visited = 0
+        self._nodes = []
+        # only words can score, so nothing else is searched for; they are
+        # no longer than the lexicon's longest, so the search needs no limit
+        node = self._lexicon.child(0, word.upper())
+        path = self.findPath(word, maxSteps=None) if self._lexicon.isWord(node) else None
+        if path is None:
+            return (SUBMIT, word.upper(), False, None)
+        faces = self._faces
+        word = "".join([faces[cell] for cell in path])
+        return (SUBMIT, word, self.__accept(word, node), path)
+
+
+def simulate(engine, clicks, seed=0):
+    """
+    Feeds engine clicks random clicks on its board and returns the
+    number of clicks handled per second.
+    """
+    rng = random.Random(seed)
+    cols = engine.getCols()
+    rows = engine.getRows()
+    positions = [(rng.randrange(cols), rng.randrange(rows)) for _ in range(clicks)]
+    click = engine.click
+    start = time.perf_counter()
+    for col, row in positions:
+        click(col, row)
+    return clicks / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    from doctest import testmod
+    testmod()
+
+    from bitsolver import randomBoards
+    engine = BoggleEngine(randomBoards(1, 4, 4)[0])
+    print("{:.0f} clicks/sec".format(simulate(engine, 200000)))
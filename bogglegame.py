@@ -1,116 +1,262 @@
 """Implements the logic of the game of boggle."""
 
+import sys
+from time import perf_counter
+
 from graphics import GraphWin
+from board import windowSize
 from boggleboard import BoggleBoard
 from boggleletter import BoggleLetter
+from boggleengine import BoggleEngine, SELECT, EXTEND, SUBMIT
+from backgroundsolver import BackgroundSolver
 from brandom import randomize
+from clickstats import ClickStats
+from lexicon import getLexicon
 
 class BoggleGame:
 
-    __slots__ = [ "_validWords", "_board", "_foundWords", "_selectedLetters" ]
+    __slots__ = [ "_validWords", "_board", "_engine", "_solver", "_clickStats" ]
 
-    def __init__(self, win):
+    def __init__(self, win, clickStats=None, rows=4, cols=4):
         """
-        Create a new Boggle Game and load in our lexicon.
+        Create a new rows x cols Boggle Game (5x5 is Big Boggle, 6x6 is
+        Super Big Boggle) and load in our lexicon.  If clickStats (a
+        ClickStats) is given, the time taken by every click is recorded
+        in it.
         """
         # set up the set of valid words we can match
         self._validWords = self.__readLexicon()
 
         # init other attributes here.
-        #here's what im thinking
-        self._board = BoggleBoard(win)
-        self._foundWords = []
-        self._selectedLetters = []
+        self._board = BoggleBoard(win, rows, cols)
+        # the engine tracks the selected path and the words found
+        self._engine = BoggleEngine(self._board.getFaces(), rows, cols, self._validWords)
+        # every board's words are worked out in the background, starting
+        # now and again after each shake
+        self._solver = BackgroundSolver(rows, cols, self._validWords)
+        self._solver.submit(self._board.getFaces())
+        self._board.setShakeHandler(self._solver.submit)
+        # a re-rolled cube changes one cell: update the engine and the
+        # solved board in place
+        self._board.setRerollHandler(self.__onReroll)
+        self._clickStats = clickStats
 
 
     def __readLexicon(self, lexiconName='bogwords.txt'):
         """
-        A helper method to read the lexicon and return it as a set.
+        A helper method to read the lexicon and return it as a Lexicon,
+        which answers both word and prefix queries.  Every game in the
+        process shares one memory-mapped copy (see lexicon.py).
+        """
+        return getLexicon(lexiconName)
+
+    def __showEvent(self, event):
         """
-        validWords = set()
-        with open(lexiconName) as f:
-          for line in f:
-            validWords.add(line.strip().upper())
+        Updates the board to reflect an event returned by BoggleEngine.click.
+        """
+        kind = event[0]
+        engine = self._engine
+
+        # a new path was started: highlight its first letter
+        if kind == SELECT:
+            col, row = engine.getPosition(event[1])
+            ourLetter = self._board.getBoggleLetter(col, row)
+            ourLetter.setFillColor("light green")
+            ourLetter.setTextColor("forest green")
+            self.__showPath(ourLetter)
 
-        return validWords
-        # given
+        # the path was extended: highlight the new letter and
+        # change colors of the previous one
+        elif kind == EXTEND:
+            col, row = engine.getPosition(event[1])
+            ourLetter = self._board.getBoggleLetter(col, row)
+            ourLetter.setFillColor("light green")
+            ourLetter.setTextColor("forest green")
+            col, row = engine.getPosition(event[2])
+            previous = self._board.getBoggleLetter(col, row)
+            previous.setFillColor("powder blue")
+            previous.setTextColor("blue")
+            self.__showPath(ourLetter)
+
+        # the word was submitted or abandoned: show any new word
+        # (and score), then reset the state
+        else:
+            if kind == SUBMIT and event[2]:
+                self._board.setStringToTextArea('\n'.join(engine.getFoundWords()))
+                # the board's words are normally solved by now; if not,
+                # leave the progress line as it was rather than wait
+                summary = self.getRoundSummary()
+                if summary["possible"] is not None:
+                    self._board.setStringToUpperText("found {} of {} words ({:.0f}%)".format(
+                        len(summary["found"]), summary["possible"], summary["completion"]))
+            self._board.setStringToLowerText("")
+            self._board.resetColors()
+
+    def __showPath(self, lastLetter):
+        """
+        Shows the word spelled so far and how many words start with it,
+        and marks lastLetter in red as soon as no word can.
+        """
+        engine = self._engine
+        count = engine.countCompletions()
+        if count == 0:
+            lastLetter.setFillColor("misty rose")
+            lastLetter.setTextColor("red")
+            status = "no words"
+        else:
+            status = "{} word{}".format(count, "" if count == 1 else "s")
+        self._board.setStringToLowerText("{} ({})".format(engine.getWord().lower(), status))
 
     def doOneClick(self, point):
         """
         Implements the logic for processing one click.
         Returns True if play should continue, and False if the game is over.
         """
-        # These steps are one way to think about the design, although
-        # you are free to do things differently if you prefer.
+        # board updates are batched so the window redraws once per click
+        win = self._board.getWin()
+        stats = self._clickStats
+        if stats is None:
+            with win.batch():
+                branch = self.__processClick(point)
+        else:
+            # time the game logic and the Tk flush separately
+            start = perf_counter()
+            with win.batch():
+                branch = self.__processClick(point)
+                logicDone = perf_counter()
+            stats.record(branch, logicDone - start, perf_counter() - logicDone)
+        return branch != "exit"
+
+    def __processClick(self, point):
+        """
+        Processes one click and returns what it did: "exit", "reset",
+        the kind of BoggleEngine event for a grid click, or "none".
+        """
+        # the rules live in BoggleEngine; here we translate the click
+        # into a grid position and draw whatever the engine reports
 
-        # step 1: check for exit button and return False if clicked
+        # step 1: check for exit button
         if self._board.inExit(point):
-            return False
+            return "exit"
 
         # step 2: check for reset button and reset
         elif self._board.inReset(point):
             self._board.resetColors()
             self._board.reset()
-            self._foundWords = []
-            self._selectedLetters = []
-            return True
+            self._engine.reset(self._board.getFaces())
+            return "reset"
 
         # step 3: check if click is on a cell in the grid
         elif self._board.inGrid(point):
-            
-            # get BoggleLetter at point
-            ourLetter = self._board.getBoggleLetterAtPoint(point)
+            (col, row) = self._board.getPosition(point)
+            event = self._engine.click(col, row)
+            self.__showEvent(event)
+            return event[0]
 
-            # if this is the first letter in a word being clicked,
-            # change the letter object colors 
-            ourLetter.setFillColor("light green")
-            ourLetter.setTextColor("forest green") 
-                
-            # check if its the first letter added and hasn't been clicked on before,
-            # and update state     
-            if self._selectedLetters == []:
-                self._selectedLetters.append(ourLetter)
-                letters = self._board.getStringFromLowerText() 
-                self._board.setStringToLowerText(letters + ourLetter.getLetter().lower())
-            
-            #else check if the letter clicked on is adjacent to the last letter
-            #and check if it hasn't been clicked on 
-            #change colors of the previous and current letter
-            #update the lower text 
-            elif ourLetter.isAdjacent(self._selectedLetters[-1]) and ourLetter not in self._selectedLetters:
-                self._selectedLetters.append(ourLetter)
-                letters = self._board.getStringFromLowerText() 
-                self._board.setStringToLowerText(letters + ourLetter.getLetter().lower())
- 
-                self._selectedLetters[-1].setFillColor("light green")
-                self._selectedLetters[-1].setTextColor("forest green")
-                self._selectedLetters[-2].setFillColor("powder blue")
-                self._selectedLetters[-2].setTextColor("blue")
-                
-
-            # else if clicked on same letter as last time, end word and check for validity
-            #convert the the list of objects(selectedLetters) to a list of strings
-            #check if the word is a valid word
-            #and check if it hasn't been found already 
-            #add score
-            #then reset the state
-            elif ourLetter == self._selectedLetters[-1]:
-                gameletters = [ourLetter.getLetter() for ourLetter in self._selectedLetters]
-                if ''.join(gameletters).upper() in self._validWords:
-                    if ''.join(gameletters).upper() not in self._foundWords:
-                        self._foundWords.append(''.join(gameletters))
-                        self._board.setStringToTextArea('\n'.join(self._foundWords))
-                self._board.setStringToLowerText("")
-                self._board.resetColors()
-                self._selectedLetters = []
-            #if clicked anywhere else, reset the state
-            else:
-                self._board.setStringToLowerText("")
-                self._board.resetColors()
-                self._selectedLetters = []
-
-        # return True to indicate we want to keep playing
-        return True 
+        # clicks anywhere else are ignored
+        return "none"
+
+    def rerollCube(self, col, row):
+        """
+        Re-rolls the cube at grid position (col, row) mid-round and
+        returns its new face.  Words already found are kept; any path in
+        progress is abandoned.
+
+        >>> from graphics import GraphWin
+        >>> from brandom import RandomStream
+        >>> from bitsolver import BitSolver
+        >>> with BoggleGame(GraphWin("Boggle", 400, 400)) as game:
+        ...     for cell in range(16):
+        ...         _ = game.rerollCube(cell % 4, cell // 4)
+        ...     faces = game._board.getFaces()
+        ...     words = set(game.getRoundSummary(timeout=5)["missed"])
+        ...     word = max(words, key=len, default=None)
+        ...     print(game._engine.getFaces() == faces, words == BitSolver().solveSet(faces))
+        ...     print(word is None or game.submitWord(word) is not None)
+        True True
+        True
+        """
+        with self._board.getWin().batch():
+            return self._board.rerollCube(col, row)
+
+    def __onReroll(self, cell, face):
+        """Reroll handler: bring the engine and solver up to date."""
+        self._engine.setFace(cell, face)
+        self._solver.update({cell: face})
+        self._board.setStringToLowerText("")
+        self._board.resetColors()
+
+    def submitWord(self, word):
+        """
+        Plays a typed word (str, any case), for clients without a mouse:
+        finds a path of adjacent, unused letters that spells it (a "Qu"
+        letter covers both Q and U) and submits it with the same rules
+        and scoring as clicking it out.  Returns the path as a list of
+        (col, row) grid positions for highlighting, or None if the word
+        is not on the board.
+        """
+        with self._board.getWin().batch():
+            event = self._engine.submitWord(word)
+            self.__showEvent(event)
+        path = event[3]
+        if path is None:
+            return None
+        return [self._engine.getPosition(cell) for cell in path]
+
+    def getRoundSummary(self, timeout=0):
+        """
+        Returns a dict describing the round so far: the words found, the
+        words missed, the number possible, the best possible score and
+        the percentage of words found.  Everything but "found" is None
+        if the background solve has not finished within timeout seconds.
+        """
+        found = [word.upper() for word in self._engine.getFoundWords()]
+        words = self._solver.getWords(timeout)
+        if words is None:
+            return {"found": found, "missed": None, "possible": None,
+                    "maxScore": None, "completion": None}
+        return {"found": found, "missed": sorted(words.difference(found)),
+                "possible": len(words), "maxScore": self._solver.getMaxScore(),
+                "completion": 100 * len(found) / len(words) if words else 100.0}
+
+    def run(self):
+        """
+        Plays the game until the exit button is clicked.  Clicks are
+        handled by Tk's event loop as they arrive, rather than by
+        polling the window with getMouse.
+        """
+        win = self._board.getWin()
+        win.setMouseHandler(self.__onClick)
+        win.mainloop()
+        self.close()
+
+    def close(self):
+        """
+        Stops the game's background solver thread.  Games that are never
+        run() (eg headless or benchmark games) must be closed, or used
+        as a context manager.
+
+        >>> import threading
+        >>> from graphics import GraphWin
+        >>> before = threading.active_count()
+        >>> with BoggleGame(GraphWin("Boggle", 400, 400)) as game:
+        ...     threading.active_count() == before + 1
+        True
+        >>> threading.active_count() == before
+        True
+        """
+        self._solver.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __onClick(self, point):
+        """Mouse handler: process the click, closing the window on exit."""
+        if not self.doOneClick(point):
+            self._board.getWin().close()
 if __name__ == '__main__':
 
     # When you are ready to run on different boards,
@@ -118,9 +264,9 @@ if __name__ == '__main__':
     # find it much easier to test your code without
     # randomizing things!
     randomize()
-    win = GraphWin("Boggle", 400, 400)
-    game = BoggleGame(win)
-    keepGoing = True
-    while keepGoing:
-        point = win.getMouse()
-        keepGoing = game.doOneClick(point)
+    # "python bogglegame.py 5" plays Big Boggle, 6 Super Big Boggle
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    win = GraphWin("Boggle", *windowSize(size, size))
+    # set BOGGLE_CLICK_STATS=file.json to record click timings
+    game = BoggleGame(win, ClickStats.fromEnvironment(), size, size)
+    game.run()
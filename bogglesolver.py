@@ -0,0 +1,85 @@
+"""
+Finds every word that can be formed on a Boggle board.
+"""
+
+from lexicon import getLexicon, WORD
+
+def neighbours(rows, cols):
+    """
+    Returns a list giving, for each cell of a rows x cols grid (numbered
+    row by row), the list of cells adjacent to it.  Uses the same rule as
+    BoggleLetter.isAdjacent: rows and columns differ by at most 1, and a
+    cell is not adjacent to itself.
+
+    >>> neighbours(2, 3)
+    [[1, 3, 4], [0, 2, 3, 4, 5], [1, 4, 5], [0, 1, 4], [0, 1, 2, 3, 5], [1, 2, 4]]
+    """
+    adjacent = []
+    for row in range(rows):
+        for col in range(cols):
+            cells = []
+            for r in range(max(row - 1, 0), min(row + 2, rows)):
+                for c in range(max(col - 1, 0), min(col + 2, cols)):
+                    if (r, c) != (row, col):
+                        cells.append(r * cols + c)
+            adjacent.append(cells)
+    return adjacent
+
+def solveFaces(faces, rows, cols, lexicon=None):
+    """
+    Returns a sorted list of every lexicon word (uppercase) that can be
+    spelled on a rows x cols grid whose faces (list of str, row by row)
+    are given.  A word follows a path of adjacent cells and never uses
+    a cell twice; a multi-letter face such as "Qu" counts as one cell.
+
+    >>> solveFaces(["C", "A", "T",
+    ...             "X", "R", "S"], 2, 3, getLexicon())
+    ['ARC', 'ART', 'CAR', 'CART', 'CAST', 'CAT', 'RAT', 'SAC', 'SAT', 'SAX', 'STAR', 'TAR', 'TAX', 'TSAR']
+    >>> solveFaces(["Qu", "I", "T", "E"], 2, 2)
+    ['QUIET', 'QUIT', 'QUITE', 'TIE']
+    """
+    if lexicon is None:
+        lexicon = getLexicon()
+    nodes = lexicon.getNodes()
+    adjacent = neighbours(rows, cols)
+    faces = [face.upper() for face in faces]
+    # the trie bit of each letter on each face, eg "QU" -> (Q bit, U bit)
+    bits = [tuple(1 << (ord(ch) - 65) for ch in face) for face in faces]
+    used = [False] * len(faces)
+    found = set()
+
+    def search(cell, node, word):
+        # extend the path into cell, stopping if no word starts this way
+        # (this inlines Lexicon.child, which is the hot spot)
+        for bit in bits[cell]:
+            mask = nodes[node]
+            if not mask & bit:
+                return
+            node = nodes[node + 1] + 2 * (mask & (bit - 1)).bit_count()
+        word += faces[cell]
+        mask = nodes[node]
+        if mask & WORD:
+            found.add(word)
+            if mask == WORD:
+                return  # no longer word starts this way
+        used[cell] = True
+        for other in adjacent[cell]:
+            if not used[other]:
+                search(other, node, word)
+        used[cell] = False
+
+    for cell in range(len(faces)):
+        search(cell, lexicon.ROOT, "")
+    return sorted(found)
+
+def solve(board, lexicon=None):
+    """
+    Returns a sorted list of every lexicon word that can be spelled on
+    board (a BoggleBoard, or anything with getFaces, getRows and getCols).
+    """
+    return solveFaces(board.getFaces(), board.getRows(), board.getCols(), lexicon)
+
+
+if __name__ == "__main__":
+    from doctest import testmod
+    testmod()
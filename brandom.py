@@ -2,13 +2,20 @@
 # brandom.py
 """
 Functions to create random numbers and random permutations of lists.
+
+By default these share Python's global generator.  For reproducible
+work spread over several processes, pass a RandomStream instead: each
+stream is independent of the others, can spawn child streams for
+workers, and can jump straight to the stream for item number k.
 """
 
+import hashlib
 import random
 
-def randomInt(start, end):
+def randomInt(start, end, rng=None):
     """
-    Returns an integer i such that start <= i <= end.
+    Returns an integer i such that start <= i <= end.  Uses the global
+    generator unless rng (eg a RandomStream) is given.
 
     >>> 0 <= randomInt(0,1) <= 1
     True
@@ -17,22 +24,103 @@ def randomInt(start, end):
     >>> randomInt(0,0)
     0
     """
-    return random.randint(start, end)
+    return (random if rng is None else rng).randint(start, end)
 
-def shuffled(seq):
+def shuffled(seq, rng=None):
     """
-    Return a new list containing the shuffled elements of seq.
+    Return a new list containing the shuffled elements of seq.  Uses the
+    global generator unless rng (eg a RandomStream) is given.
 
     >>> shuffled([]) == []
     True
     >>> set(shuffled([1,2,3])) == set([1,2,3])
     True
+    >>> shuffled(list(range(10)), RandomStream(1)) == shuffled(list(range(10)), RandomStream(1))
+    True
     """
     mixed = seq.copy()
-    random.shuffle(mixed)
+    (random if rng is None else rng).shuffle(mixed)
     return mixed
 
 
+def _keySeed(key):
+    """Turns a stream key (a tuple) into a 256-bit integer seed."""
+    return int.from_bytes(hashlib.sha256(repr(key).encode()).digest(), "big")
+
+class RandomStream(random.Random):
+    """A RandomStream is a random.Random whose seed is derived from a key:
+    the user's seed, followed by the steps taken to reach this stream.
+    Streams with different keys are statistically independent, so
+    they can be used by different processes without coordination, and
+    any stream can be recreated from its key alone.
+
+    >>> a, b = RandomStream(42).spawn(2)
+    >>> a.getKey(), b.getKey()
+    ((42, 'spawn', 0), (42, 'spawn', 1))
+    >>> a.random() == b.random()
+    False
+    >>> RandomStream(42).jumped(1000).random() == RandomStream(42).jumped(1000).random()
+    True
+    >>> import pickle
+    >>> s = RandomStream(7); s.random() < 1
+    True
+    >>> t = pickle.loads(pickle.dumps(s))
+    >>> t.getKey(), t.random() == s.random()
+    ((7,), True)
+    """
+
+    def __init__(self, seed=0, key=None):
+        """
+        Make the stream for seed (an int or str), or for an explicit key
+        (a tuple) as returned by getKey.
+        """
+        self._key = (seed,) if key is None else tuple(key)
+        self._spawned = 0
+        super().__init__(_keySeed(self._key))
+
+    def getKey(self):
+        return self._key
+
+    def spawn(self, count):
+        """
+        Return a list of count new child streams, eg one per worker.
+        Later calls return further, different children.
+        """
+        first = self._spawned
+        self._spawned += count
+        return [RandomStream(key=self._key + ("spawn", i)) for i in range(first, first + count)]
+
+    def jumped(self, k):
+        """
+        Return the stream for item number k (eg board k) of this stream's
+        sequence.  It is made directly from the key, so item k costs the
+        same however large k is, and is the same in every process.
+        """
+        return RandomStream(key=self._key + ("jump", k))
+
+    def toNumpy(self):
+        """
+        Return a numpy Generator seeded from the next 128 bits of this
+        stream, so each call gives a new Generator, and the same series
+        of them for the same key.
+
+        >>> s = RandomStream(4)
+        >>> first, second = s.toNumpy().integers(1 << 30), s.toNumpy().integers(1 << 30)
+        >>> bool(first == second), bool(first == RandomStream(4).toNumpy().integers(1 << 30))
+        (False, True)
+        """
+        import numpy as np
+        return np.random.default_rng(self.getrandbits(128))
+
+    def __reduce__(self):
+        # keep the key when streams are pickled (eg sent to workers)
+        return (self.__class__, (0, self._key), (self.getstate(), self._spawned))
+
+    def __setstate__(self, state):
+        self.setstate(state[0])
+        self._spawned = state[1]
+
+
 def randomize(seed = None):
     """
     Call this with no arguments to randomize the random
@@ -0,0 +1,172 @@
+"""
+Measures click-to-repaint latency of the Boggle game, comparing the old
+getMouse polling loop with the event-driven BoggleGame.run().
+
+A helper thread plays the part of the mouse: at random moments it writes
+a timestamp into a pipe that Tk watches, just as a real click arrives on
+the display connection.  Tk hands the click to the window, the game
+processes and redraws it, and the time from "click" to "redraw done"
+is recorded.  The polling loop only notices the pipe when it next calls
+update(), up to 0.1s later; the event loop wakes up at once.
+
+Usage:
+    python clicklatency.py [clicks]
+    GRAPHICS_BACKEND=null python clicklatency.py [clicks]
+
+Under Tk this needs a display.  Under the null backend nothing is drawn
+and the pipe is watched as Tk would watch it (see _watch), so the wait
+for a click to be noticed is the same; only the drawing is left out.
+"""
+
+import os
+import random
+import select
+import struct
+import sys
+import threading
+import time
+import tkinter as tk
+
+import graphics
+from graphics import GraphWin
+from bogglegame import BoggleGame
+
+_STAMP = struct.Struct("d")
+
+class _Click:
+    """Stands in for the Tk event passed to GraphWin._onClick."""
+    __slots__ = ['x', 'y']
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+def _clickPoints(board, clicks, seed):
+    """Returns screen positions of clicks random grid clicks, then exit."""
+    rng = random.Random(seed)
+    size = board.getSize()
+    points = []
+    for _ in range(clicks):
+        col = rng.randrange(board.getCols())
+        row = rng.randrange(board.getRows())
+        points.append((board.getXInset() + size * col + size // 2,
+                       board.getYInset() + size * row + size // 2))
+    exit = board.getExitButton().getCenter()
+    points.append(board.getWin().toScreen(exit.getX(), exit.getY()))
+    return points
+
+def _watch(fd, callback):
+    """
+    Has the event loop call callback() whenever fd can be read, and
+    returns a function that stops it.  Tk watches fd itself.  The null
+    backend has no event loop, so its root's update() and mainloop() are
+    stood in for: update() handles whatever is waiting, and mainloop()
+    waits in select() until quit(), as Tk waits on the display.
+    """
+    root = graphics._getRoot()
+    if isinstance(root, tk.Tk):
+        root.createfilehandler(fd, tk.READABLE, lambda fd, mask: callback())
+        return lambda: root.deletefilehandler(fd)
+    update = root.update
+    running = [False]
+
+    def pump():
+        update()
+        while select.select([fd], [], [], 0)[0]:
+            callback()
+
+    def mainloop():
+        running[0] = True
+        while running[0]:
+            select.select([fd], [], [])
+            callback()
+
+    def quit():
+        running[0] = False
+
+    root.update, root.mainloop, root.quit = pump, mainloop, quit
+    def stop():
+        del root.update, root.mainloop, root.quit
+    return stop
+
+def _mouse(fd, count, seed):
+    """Thread body: write count click timestamps at random intervals.
+    The last click (EXIT) comes after a longer pause, so the polling loop
+    cannot lose it and wait forever."""
+    rng = random.Random(seed)
+    for i in range(count):
+        time.sleep(0.5 if i == count - 1 else rng.uniform(0.05, 0.25))
+        os.write(fd, _STAMP.pack(time.perf_counter()))
+
+def measure(mode, clicks=50, seed=0):
+    """
+    Plays clicks random clicks through the game loop named by mode
+    ("polling" or "event") and returns the list of latencies (seconds)
+    of the clicks handled.  Clicks that arrive together during one of the
+    polling loop's sleeps are handled as one, the last, so the list can
+    be shorter than clicks + 1.
+    """
+    win = GraphWin("Boggle", 400, 400)
+    game = BoggleGame(win)
+    points = _clickPoints(game._board, clicks, seed)
+    sent = []       # timestamps of clicks delivered but not yet handled
+    latencies = []
+
+    delivered = [0]
+    readFd, writeFd = os.pipe()
+    def onPipe():
+        # a click "arrives": pass it to the window like Tk would
+        sent.append(_STAMP.unpack(os.read(readFd, _STAMP.size))[0])
+        delivered[0] += 1
+        win._onClick(_Click(*points[delivered[0] - 1]))
+    unwatch = _watch(readFd, onPipe)
+
+    def handled():
+        # the click handled is the last one delivered; any before it
+        # were overwritten unseen
+        latencies.append(time.perf_counter() - sent.pop())
+        sent.clear()
+
+    mouse = threading.Thread(target=_mouse, args=(writeFd, len(points), seed))
+    mouse.start()
+    # a null window's own getMouse and mainloop only replay queued
+    # clicks, so GraphWin's are called, which wait on the root as a Tk
+    # window does
+    try:
+        if mode == "polling":
+            # the loop bogglegame.py used before run() existed
+            keepGoing = True
+            while keepGoing:
+                point = GraphWin.getMouse(win)
+                keepGoing = game.doOneClick(point)
+                handled()
+            win.close()
+        else:
+            def onClick(point):
+                keepGoing = game.doOneClick(point)
+                handled()
+                if not keepGoing:
+                    win.close()
+            win.setMouseHandler(onClick)
+            GraphWin.mainloop(win)
+    finally:
+        mouse.join()
+        game.close()
+        unwatch()
+        os.close(readFd)
+        os.close(writeFd)
+    return latencies
+
+def _summary(latencies, clicks):
+    latencies = sorted(latencies)
+    def pct(p):
+        return 1000 * latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+    return "p50 {:6.1f}ms  p95 {:6.1f}ms  max {:6.1f}ms  {} of {} clicks lost".format(
+        pct(0.5), pct(0.95), 1000 * latencies[-1], clicks - len(latencies), clicks)
+
+
+if __name__ == "__main__":
+    clicks = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    print("{} backend, {} clicks".format(graphics.getBackend(), clicks))
+    for mode in ("polling", "event"):
+        print("{:8s} {}".format(mode, _summary(measure(mode, clicks), clicks + 1)))
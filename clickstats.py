@@ -0,0 +1,155 @@
+"""
+Records how long BoggleGame takes to handle each click, split by what
+the click did (exit, reset, select, extend, submit, clear) and into
+logic time and Tk flush time.
+"""
+
+import atexit
+import json
+import math
+import os
+
+# bucket i of a histogram holds durations below 2 ** (i / _STEPS) microseconds
+_STEPS = 4
+_BUCKETS = 32 * _STEPS
+
+class LatencyHistogram:
+    """A LatencyHistogram counts durations in log-scale buckets (four per
+    doubling, from 1 microsecond up), so it takes constant memory no
+    matter how many durations are added.  Percentiles are accurate to
+    about 19%.
+
+    >>> h = LatencyHistogram()
+    >>> for us in range(1, 101):
+    ...     h.add(us / 1e6)
+    >>> h.getCount(), round(h.getMean() * 1e6, 1), round(h.getMax() * 1e6)
+    (100, 50.5, 100)
+    >>> 45 <= h.percentile(50) * 1e6 <= 60
+    True
+    """
+
+    __slots__ = ['_counts', '_count', '_total', '_max']
+
+    def __init__(self):
+        self._counts = [0] * _BUCKETS
+        self._count = 0
+        self._total = 0.0
+        self._max = 0.0
+
+    def add(self, seconds):
+        """Add one duration (in seconds)."""
+        micros = seconds * 1e6
+        bucket = 0 if micros < 1 else min(int(math.log2(micros) * _STEPS) + 1, _BUCKETS - 1)
+        self._counts[bucket] += 1
+        self._count += 1
+        self._total += seconds
+        if seconds > self._max:
+            self._max = seconds
+
+    def getCount(self):
+        return self._count
+
+    def getMean(self):
+        return self._total / self._count if self._count else 0.0
+
+    def getMax(self):
+        return self._max
+
+    def percentile(self, p):
+        """Returns the duration (seconds) below which p percent fall."""
+        target = self._count * p / 100
+        seen = 0
+        for bucket, count in enumerate(self._counts):
+            seen += count
+            if count and seen >= target:
+                return min(2 ** (bucket / _STEPS) / 1e6, self._max)
+        return self._max
+
+    def toDict(self):
+        """Returns a summary of the histogram that json can write."""
+        return {"count": self._count, "mean": self.getMean(), "max": self._max,
+                "p50": self.percentile(50), "p90": self.percentile(90),
+                "p99": self.percentile(99),
+                "buckets": {"{:.3g}us".format(2 ** (i / _STEPS)): count
+                            for i, count in enumerate(self._counts) if count}}
+
+
+class ClickStats:
+    """ClickStats keeps one pair of histograms (logic time, flush time)
+    per kind of click.  Pass one to BoggleGame to turn on timing.
+
+    >>> stats = ClickStats()
+    >>> stats.record("select", 0.000020, 0.000400)
+    >>> stats.record("select", 0.000030, 0.000500)
+    >>> stats.getLogic("select").getCount(), stats.getBranches()
+    (2, ['select'])
+    """
+
+    __slots__ = ['_logic', '_flush', '_fileName']
+
+    def __init__(self, fileName=None):
+        """
+        Create empty statistics.  If fileName is given, the statistics
+        are written there (as JSON) when the program exits.
+        """
+        self._logic = {}
+        self._flush = {}
+        self._fileName = fileName
+        if fileName is not None:
+            atexit.register(self.dump)
+
+    @classmethod
+    def fromEnvironment(cls, variable="BOGGLE_CLICK_STATS"):
+        """
+        Returns ClickStats that dump to the file named by the environment
+        variable, or None (timing off) if it is not set.
+        """
+        fileName = os.environ.get(variable)
+        return cls(fileName) if fileName else None
+
+    def record(self, branch, logicSeconds, flushSeconds):
+        """Record one click of kind branch (str)."""
+        logic = self._logic.get(branch)
+        if logic is None:
+            logic = self._logic[branch] = LatencyHistogram()
+            self._flush[branch] = LatencyHistogram()
+        logic.add(logicSeconds)
+        self._flush[branch].add(flushSeconds)
+
+    def getBranches(self):
+        return sorted(self._logic)
+
+    def getLogic(self, branch):
+        return self._logic[branch]
+
+    def getFlush(self, branch):
+        return self._flush[branch]
+
+    def toDict(self):
+        return {branch: {"logic": self._logic[branch].toDict(),
+                         "flush": self._flush[branch].toDict()}
+                for branch in self.getBranches()}
+
+    def dump(self, fileName=None):
+        """Write the statistics as JSON to fileName (default: the file
+        given when they were created)."""
+        fileName = fileName or self._fileName
+        with open(fileName, "w") as f:
+            json.dump(self.toDict(), f, indent=2)
+
+    def __str__(self):
+        lines = []
+        for branch in self.getBranches():
+            logic = self._logic[branch]
+            flush = self._flush[branch]
+            lines.append("{:7s} n={:<6d} logic p50 {:8.1f}us p99 {:8.1f}us   "
+                         "flush p50 {:8.1f}us p99 {:8.1f}us".format(
+                             branch, logic.getCount(),
+                             logic.percentile(50) * 1e6, logic.percentile(99) * 1e6,
+                             flush.percentile(50) * 1e6, flush.percentile(99) * 1e6))
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    from doctest import testmod
+    testmod()
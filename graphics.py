@@ -63,6 +63,18 @@ http://mcsp.wartburg.edu/zelle/python for a quick reference"""
 
 __version__ = "5.0"
 
+# Local changes for the Boggle project
+#     * GraphWin.batch() defers item reconfigs and flushes once at the end
+#     * GraphWin.mainloop() runs an event-driven loop that calls the mouse
+#       handler per click, instead of polling getMouse; mouse handlers
+#       now receive world coordinates
+#     * Pluggable backends: setting GRAPHICS_BACKEND=null (or calling
+#       setBackend("null") before any window exists) makes GraphWin
+#       create NullGraphWin objects, which draw nothing and just record
+#       and count canvas operations, so no display is needed
+#     * The Tk root is created when the first window needs it, not at
+#       import time
+
 # Version 5 8/26/2016
 #     * update at bottom to fix MacOS issue causing askopenfile() to hang
 #     * update takes an optional parameter specifying update rate
@@ -162,6 +174,7 @@ __version__ = "5.0"
 #     Added Entry boxes.
 
 import time, os, sys
+from contextlib import contextmanager
 
 try:  # import as appropriate for 2.x vs. 3.x
    import tkinter as tk
@@ -183,8 +196,67 @@ BAD_OPTION = "Illegal option value"
 ##########################################################################
 # global variables and funtions
 
-_root = tk.Tk()
-_root.withdraw()
+class _NullRoot:
+    """Stands in for the Tk root under the null backend. It counts the
+    updates that would have been run."""
+
+    def __init__(self):
+        self.updates = 0
+
+    def update(self):
+        self.updates += 1
+
+    def update_idletasks(self):
+        pass
+
+    def withdraw(self):
+        pass
+
+    def mainloop(self):
+        pass
+
+    def quit(self):
+        pass
+
+BACKENDS = ("tk", "null")
+_backend = os.environ.get("GRAPHICS_BACKEND", "tk")
+if _backend not in BACKENDS:
+    raise GraphicsError("unknown GRAPHICS_BACKEND " + repr(_backend))
+
+# the root is only made when first needed (normally by the first
+# GraphWin), so importing this module stays cheap and needs no display
+_root = None
+
+def _getRoot():
+    global _root
+    if _root is None:
+        if _backend == "tk":
+            _root = tk.Tk()
+            _root.withdraw()
+            _root.update()   # MacOS fix 1
+        else:
+            _root = _NullRoot()
+    return _root
+
+def getBackend():
+    """Return the name of the backend new windows are created with"""
+    return _backend
+
+def setBackend(name):
+    """Choose the backend ("tk" or "null") for new windows. The root
+    object is shared, so the backend can't change while Tk windows
+    are open."""
+    global _backend, _root
+    if name not in BACKENDS:
+        raise GraphicsError(BAD_OPTION)
+    if name == _backend:
+        return
+    if isinstance(_root, tk.Tk):
+        if _root.winfo_children():
+            raise GraphicsError("can't switch backend while Tk windows are open")
+        _root.destroy()
+    _root = None
+    _backend = name
 
 _update_lasttime = time.time()
 
@@ -199,7 +271,7 @@ def update(rate=None):
         else:
             _update_lasttime = now
 
-    _root.update()
+    _getRoot().update()
 
 ############################################################################
 # Graphics classes start here
@@ -208,31 +280,45 @@ class GraphWin(tk.Canvas):
 
     """A GraphWin is a toplevel window for displaying graphics."""
 
+    def __new__(cls, *args, **kwargs):
+        # under the null backend a plain GraphWin() makes a NullGraphWin
+        if cls is GraphWin and _backend == "null":
+            cls = NullGraphWin
+        return tk.Canvas.__new__(cls)
+
     def __init__(self, title="Graphics Window",
                  width=200, height=200, autoflush=True):
         assert type(title) == type(""), "Title must be a string"
-        master = tk.Toplevel(_root)
+        master = tk.Toplevel(_getRoot())
         master.protocol("WM_DELETE_WINDOW", self.close)
         tk.Canvas.__init__(self, master, width=width, height=height,
                            highlightthickness=0, bd=0)
         self.master.title(title)
         self.pack()
         master.resizable(0,0)
+        self._initState(width, height, autoflush)
+        self.bind("<Button-1>", self._onClick)
+        self.bind_all("<Key>", self._onKey)
+        master.lift()
+        if autoflush: _getRoot().update()
+
+    def _initState(self, width, height, autoflush):
+        # window state shared by every backend
         self.foreground = "black"
         self.items = []
         self.mouseX = None
         self.mouseY = None
-        self.bind("<Button-1>", self._onClick)
-        self.bind_all("<Key>", self._onKey)
         self.height = int(height)
         self.width = int(width)
         self.autoflush = autoflush
         self._mouseCallback = None
         self.trans = None
         self.closed = False
-        master.lift()
         self.lastKey = ""
-        if autoflush: _root.update()
+        self._batchDepth = 0
+        self._savedAutoflush = autoflush
+        self._pending = {}   # items reconfigured during batch()
+        self._running = False
 
     def __repr__(self):
         if self.isClosed():
@@ -272,6 +358,8 @@ class GraphWin(tk.Canvas):
         self.closed = True
         self.master.destroy()
         self.__autoflush()
+        if self._running:
+            _getRoot().quit()
 
 
     def isClosed(self):
@@ -284,7 +372,7 @@ class GraphWin(tk.Canvas):
 
     def __autoflush(self):
         if self.autoflush:
-            _root.update()
+            _getRoot().update()
 
 
     def plot(self, x, y, color="black"):
@@ -306,6 +394,34 @@ class GraphWin(tk.Canvas):
         self.__checkOpen()
         self.update_idletasks()
 
+    @contextmanager
+    def batch(self):
+        """Context manager that groups drawing changes. Inside
+        'with win.batch():' item reconfigs are only recorded, and no
+        update is run; when the outermost block exits each changed
+        item is reconfigured once and the window is updated once.
+        Blocks may be nested."""
+        if self._batchDepth == 0:
+            self._savedAutoflush = self.autoflush
+            self.autoflush = False
+        self._batchDepth += 1
+        try:
+            yield self
+        finally:
+            self._batchDepth -= 1
+            if self._batchDepth == 0:
+                self.autoflush = self._savedAutoflush
+                self._flushPending()
+
+    def _flushPending(self):
+        pending = self._pending
+        self._pending = {}
+        if self.closed: return
+        for item in pending.values():
+            if item.canvas is self:
+                self.itemconfig(item.id, item.config)
+        self.__autoflush()
+
     def getMouse(self):
         """Wait for mouse click and return Point object representing
         the click"""
@@ -381,11 +497,23 @@ class GraphWin(tk.Canvas):
     def setMouseHandler(self, func):
         self._mouseCallback = func
 
+    def mainloop(self):
+        """Process events until the window is closed, calling the
+        function given to setMouseHandler with a Point for each click.
+        Unlike a getMouse loop this sleeps until Tk has an event, so
+        clicks are handled as soon as they arrive."""
+        self.__checkOpen()
+        self._running = True
+        try:
+            _getRoot().mainloop()
+        finally:
+            self._running = False
+
     def _onClick(self, e):
         self.mouseX = e.x
         self.mouseY = e.y
         if self._mouseCallback:
-            self._mouseCallback(Point(e.x, e.y))
+            self._mouseCallback(Point(*self.toWorld(e.x, e.y)))
 
     def addItem(self, item):
         self.items.append(item)
@@ -400,6 +528,154 @@ class GraphWin(tk.Canvas):
         self.update()
 
 
+class _NullMaster:
+    """Stands in for the Toplevel of a NullGraphWin."""
+
+    def __init__(self, title):
+        self._title = title
+
+    def title(self, title=None):
+        if title is None:
+            return self._title
+        self._title = title
+
+    def destroy(self):
+        pass
+
+
+class NullGraphWin(GraphWin):
+
+    """A GraphWin that needs no display. Nothing is drawn; instead the
+    window keeps the current type, coordinates and options of every
+    canvas item, and counts the canvas operations performed (plus the
+    updates, which are counted across all null windows). Clicks can be
+    queued with queueClick for getMouse/checkMouse to return."""
+
+    def __init__(self, title="Graphics Window",
+                 width=200, height=200, autoflush=True):
+        assert type(title) == type(""), "Title must be a string"
+        self.master = _NullMaster(title)
+        self._initState(width, height, autoflush)
+        self._canvasItems = {}   # id -> [type, coords, options]
+        self._nextId = 1
+        self._ops = {}
+        self._clicks = []
+        self._startUpdates = getattr(_getRoot(), "updates", 0)
+        if autoflush: _getRoot().update()
+
+    def _count(self, op):
+        self._ops[op] = self._ops.get(op, 0) + 1
+
+    def getOpCounts(self):
+        """Return a dict counting each kind of canvas operation"""
+        counts = dict(self._ops)
+        counts["update"] = getattr(_getRoot(), "updates", 0) - self._startUpdates
+        return counts
+
+    def getCanvasItems(self):
+        """Return a dict mapping item id to [type, coords, options]"""
+        return self._canvasItems
+
+    def _create(self, kind, args, kwargs):
+        self._count("create")
+        coords = [a for a in args if not isinstance(a, dict)]
+        options = {}
+        for a in args:
+            if isinstance(a, dict):
+                options.update(a)
+        options.update(kwargs)
+        itemId = self._nextId
+        self._nextId += 1
+        self._canvasItems[itemId] = [kind, coords, options]
+        return itemId
+
+    def create_line(self, *args, **kwargs):
+        return self._create("line", args, kwargs)
+
+    def create_rectangle(self, *args, **kwargs):
+        return self._create("rectangle", args, kwargs)
+
+    def create_oval(self, *args, **kwargs):
+        return self._create("oval", args, kwargs)
+
+    def create_polygon(self, *args, **kwargs):
+        return self._create("polygon", args, kwargs)
+
+    def create_text(self, *args, **kwargs):
+        return self._create("text", args, kwargs)
+
+    def create_image(self, *args, **kwargs):
+        return self._create("image", args, kwargs)
+
+    def create_window(self, *args, **kwargs):
+        return self._create("window", args, kwargs)
+
+    def itemconfig(self, itemId, options=None, **kwargs):
+        self._count("itemconfig")
+        item = self._canvasItems.get(itemId)
+        if item is not None:
+            item[2].update(options or {})
+            item[2].update(kwargs)
+
+    itemconfigure = itemconfig
+
+    def delete(self, itemId):
+        self._count("delete")
+        self._canvasItems.pop(itemId, None)
+
+    def move(self, itemId, dx, dy):
+        self._count("move")
+        item = self._canvasItems.get(itemId)
+        if item is not None:
+            item[1] = [c + (dy if i % 2 else dx) for i, c in enumerate(item[1])]
+
+    def config(self, **kwargs):
+        self._count("config")
+
+    configure = config
+
+    def update(self):
+        _getRoot().update()
+
+    def update_idletasks(self):
+        pass
+
+    def bind(self, *args):
+        pass
+
+    def bind_all(self, *args):
+        pass
+
+    def focus_set(self):
+        pass
+
+    def queueClick(self, x, y):
+        """Queue a click at window coordinates (x, y) for getMouse"""
+        self._clicks.append((x, y))
+
+    def getMouse(self):
+        """Return the next queued click (there is no real mouse)"""
+        if self.isClosed(): raise GraphicsError("getMouse in closed window")
+        if not self._clicks:
+            raise GraphicsError("getMouse on a null window with no queued clicks")
+        return self.checkMouse()
+
+    def checkMouse(self):
+        if self.isClosed():
+            raise GraphicsError("checkMouse in closed window")
+        if not self._clicks:
+            return None
+        x, y = self._clicks.pop(0)
+        return Point(*self.toWorld(x, y))
+
+    def mainloop(self):
+        """Deliver every queued click to the mouse handler"""
+        while self._clicks and not self.closed:
+            x, y = self._clicks.pop(0)
+            if self._mouseCallback:
+                self._mouseCallback(Point(*self.toWorld(x, y)))
+
+
 class Transform:
 
     """Internal class for 2-D coordinate transformations"""
@@ -485,7 +761,7 @@ class GraphicsObject:
         self.id = self._draw(graphwin, self.config)
         graphwin.addItem(self)
         if graphwin.autoflush:
-            _root.update()
+            _getRoot().update()
         return self
 
 
@@ -499,7 +775,7 @@ class GraphicsObject:
             self.canvas.delete(self.id)
             self.canvas.delItem(self)
             if self.canvas.autoflush:
-                _root.update()
+                _getRoot().update()
         self.canvas = None
         self.id = None
 
@@ -521,7 +797,7 @@ class GraphicsObject:
                 y = dy
             self.canvas.move(self.id, x, y)
             if canvas.autoflush:
-                _root.update()
+                _getRoot().update()
 
     def _reconfig(self, option, setting):
         # Internal method for changing configuration of the object
@@ -532,9 +808,13 @@ class GraphicsObject:
         options = self.config
         options[option] = setting
         if self.canvas and not self.canvas.isClosed():
+            if self.canvas._batchDepth:
+                # inside GraphWin.batch(): apply once when it ends
+                self.canvas._pending[id(self)] = self
+                return
             self.canvas.itemconfig(self.id, options)
             if self.canvas.autoflush:
-                _root.update()
+                _getRoot().update()
 
 
     def _draw(self, canvas, options):
@@ -798,7 +1078,7 @@ class Entry(GraphicsObject):
         self.anchor = p.clone()
         #print self.anchor
         self.width = width
-        self.text = tk.StringVar(_root)
+        self.text = tk.StringVar(_getRoot())
         self.text.set("")
         self.fill = "gray"
         self.color = "black"
@@ -893,10 +1173,10 @@ class Image(GraphicsObject):
         self.imageId = Image.idCount
         Image.idCount = Image.idCount + 1
         if len(pixmap) == 1: # file name provided
-            self.img = tk.PhotoImage(file=pixmap[0], master=_root)
+            self.img = tk.PhotoImage(file=pixmap[0], master=_getRoot())
         else: # width and height provided
             width, height = pixmap
-            self.img = tk.PhotoImage(master=_root, width=width, height=height)
+            self.img = tk.PhotoImage(master=_getRoot(), width=width, height=height)
 
     def __repr__(self):
         return "Image({}, {}, {})".format(self.anchor, self.getWidth(), self.getHeight())
@@ -1019,8 +1299,8 @@ def test():
 #MacOS fix 2
 #tk.Toplevel(_root).destroy()
 
-# MacOS fix 1
-update()
+# MacOS fix 1 (an update() here) now runs in _getRoot, when the root
+# is created
 
 if __name__ == "__main__":
     test()
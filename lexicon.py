@@ -0,0 +1,401 @@
+"""
+Implements a lexicon of words backed by a compact trie, supporting both
+word lookups and prefix queries.
+"""
+
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from collections import deque
+
+# bits 0-25 of a node's mask mark the letters A-Z that have a child node,
+# and this bit marks a node that ends a word
+WORD = 1 << 26
+_END = "$"
+
+# header of a compiled lexicon file: magic, format version, byte order
+# (0 little, 1 big), bytes per node slot, number of node slots, words;
+# the header is followed by the node slots, then one completion count
+# per node
+_MAGIC = b"BLEX"
+_VERSION = 2
+_HEADER = struct.Struct("<4sBBHII")
+
+def _completionCounts(nodes):
+    """
+    Returns an array holding, for each node (node index // 2), the
+    number of words that end at or below it.  Children always follow
+    their parent in the array, so one backwards pass suffices.
+    """
+    counts = array('I', bytes(len(nodes) * array('I').itemsize // 2))
+    for index in range(len(nodes) - 2, -1, -2):
+        mask = nodes[index]
+        total = 1 if mask & WORD else 0
+        first = nodes[index + 1] // 2
+        for child in range(first, first + (mask & (WORD - 1)).bit_count()):
+            total += counts[child]
+        counts[index // 2] = total
+    return counts
+
+class Lexicon:
+    """A Lexicon is an immutable set of uppercase words stored as a trie
+    flattened into a single array of unsigned ints.  Every node takes
+    two consecutive slots in the array, and is named by the index of
+    its first slot:
+       *  a mask whose bits 0-25 mark which letters (A-Z) lead to a child
+          node, and whose bit 26 is set if the node ends a word
+       *  the index of the node's first child; the children of a node
+          are stored next to each other in alphabetical order
+    The root node is always at index 0.
+
+    >>> lex = Lexicon.fromWords(["cat", "cats", "car", "dog"])
+    >>> len(lex)
+    4
+    >>> lex.contains("CAT"), lex.contains("ca"), "dog" in lex
+    (True, False, True)
+    >>> lex.hasPrefix("CA"), lex.hasPrefix("CO"), lex.hasPrefix("")
+    (True, False, True)
+    >>> list(lex.iterCompletions("ca"))
+    ['CAR', 'CAT', 'CATS']
+    >>> list(lex.iterCompletions("x"))
+    []
+    >>> lex.countCompletions(lex.child(Lexicon.ROOT, "CA")), lex.countCompletions(Lexicon.ROOT)
+    (3, 4)
+    """
+
+    __slots__ = ['_nodes', '_size', '_counts', '_reversed']
+
+    ROOT = 0
+
+    def __init__(self, nodes, size, counts=None):
+        """
+        Construct a Lexicon from an already flattened trie (nodes) holding
+        size words, and optionally its completion counts (worked out on
+        first use if not given).  Use fromWords() or fromFile() to build
+        a new one.
+        """
+        self._nodes = nodes
+        self._size = size
+        self._counts = counts
+        self._reversed = None
+
+    @classmethod
+    def fromWords(cls, words):
+        """
+        Build a Lexicon from an iterable of words.  Words are stripped and
+        uppercased, and blank entries are skipped.
+        """
+        # build a nested dictionary trie first, then flatten it
+        root = {}
+        size = 0
+        for word in words:
+            word = word.strip().upper()
+            if word == "":
+                continue
+            if not (word.isascii() and word.isalpha()):
+                raise ValueError("lexicon words must be letters A-Z: {!r}".format(word))
+            trie = root
+            for ch in word:
+                trie = trie.setdefault(ch, {})
+            if _END not in trie:
+                trie[_END] = True
+                size += 1
+
+        # lay the nodes out breadth first so siblings are contiguous
+        nodes = array('I', [0, 0])
+        queue = deque([(root, 0)])
+        while queue:
+            trie, index = queue.popleft()
+            letters = sorted(ch for ch in trie if ch != _END)
+            mask = WORD if _END in trie else 0
+            for ch in letters:
+                mask |= 1 << (ord(ch) - 65)
+            nodes[index] = mask
+            nodes[index + 1] = len(nodes)
+            for ch in letters:
+                queue.append((trie[ch], len(nodes)))
+                nodes.extend((0, 0))
+        return cls(memoryview(nodes).toreadonly(), size)
+
+    @classmethod
+    def fromFile(cls, lexiconName='bogwords.txt'):
+        """
+        Build a Lexicon from a text file with one word per line.
+        """
+        with open(lexiconName) as f:
+            return cls.fromWords(f)
+
+    @classmethod
+    def fromCompiled(cls, compiledName):
+        """
+        Memory-map a file written by compileLexicon() and return a Lexicon
+        that reads its nodes straight from the mapping, without copying.
+        Raises ValueError if the file was not compiled for this machine.
+        """
+        with open(compiledName, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, order, itemsize, slots, size = _HEADER.unpack_from(mapped)
+        if (magic != _MAGIC or version != _VERSION or
+            order != (sys.byteorder == "big") or itemsize != array('I').itemsize or
+            len(mapped) != _HEADER.size + (slots + slots // 2) * itemsize):
+            mapped.close()
+            raise ValueError("{} is not a compatible compiled lexicon".format(compiledName))
+        # the memoryview keeps the mapping alive for as long as it is used
+        view = memoryview(mapped)
+        end = _HEADER.size + slots * itemsize
+        return cls(view[_HEADER.size:end].cast('I'), size, view[end:].cast('I'))
+
+    def getNodes(self):
+        """Returns the flattened trie (a sequence of unsigned ints)."""
+        return self._nodes
+
+    def child(self, node, letters):
+        """
+        Returns the node reached by following letters (str, uppercase)
+        down from node, or -1 if no word continues that way.  letters
+        may hold more than one character, eg "QU".
+
+        >>> lex = Lexicon.fromWords(["quit"])
+        >>> lex.isWord(lex.child(lex.child(Lexicon.ROOT, "QU"), "IT"))
+        True
+        >>> lex.child(Lexicon.ROOT, "QI")
+        -1
+        """
+        nodes = self._nodes
+        for ch in letters:
+            code = ord(ch) - 65
+            if not 0 <= code < 26:
+                return -1
+            bit = 1 << code
+            mask = nodes[node]
+            if not mask & bit:
+                return -1
+            node = nodes[node + 1] + 2 * (mask & (bit - 1)).bit_count()
+        return node
+
+    def getCounts(self):
+        """Returns the completion count of every node (node // 2)."""
+        if self._counts is None:
+            self._counts = memoryview(_completionCounts(self._nodes)).toreadonly()
+        return self._counts
+
+    def getReversedPrefixes(self):
+        """
+        Returns (backward, forward): a Lexicon holding every prefix of
+        every word spelt backwards, and an array that maps each node of
+        it ending such a prefix (node // 2) to the node of the prefix in
+        this Lexicon (-1 for other nodes).  Lets a search start in the
+        middle of a word and work outwards.  Built on first use.
+
+        >>> lex = Lexicon.fromWords(["cat", "cats"])
+        >>> backward, forward = lex.getReversedPrefixes()
+        >>> sorted(backward)
+        ['AC', 'C', 'STAC', 'TAC']
+        >>> forward[backward.child(Lexicon.ROOT, "TAC") >> 1] == lex.child(Lexicon.ROOT, "CAT")
+        True
+        """
+        if self._reversed is None:
+            nodes = self._nodes
+            prefixes = []   # (prefix, node) for every node but the root
+            stack = [(Lexicon.ROOT, "")]
+            while stack:
+                node, prefix = stack.pop()
+                mask = nodes[node]
+                child = nodes[node + 1]
+                for i in range(26):
+                    if mask & (1 << i):
+                        prefixes.append((prefix + chr(65 + i), child))
+                        stack.append(prefixes[-1][::-1])
+                        child += 2
+            backward = Lexicon.fromWords(prefix[::-1] for prefix, _ in prefixes)
+            forward = array('i', [-1]) * (len(backward.getNodes()) // 2)
+            for prefix, node in prefixes:
+                forward[backward.child(Lexicon.ROOT, prefix[::-1]) >> 1] = node
+            self._reversed = (backward, memoryview(forward).toreadonly())
+        return self._reversed
+
+    def countCompletions(self, node):
+        """
+        Returns the number of words that start with the letters leading
+        to node (including a word ending at node), or 0 if node is -1.
+        """
+        if node < 0:
+            return 0
+        return self.getCounts()[node >> 1]
+
+    def isWord(self, node):
+        """Returns True if node marks the end of a word."""
+        return node >= 0 and bool(self._nodes[node] & WORD)
+
+    def contains(self, word):
+        """Returns True if word (str, any case) is in the lexicon."""
+        return self.isWord(self.child(Lexicon.ROOT, word.upper()))
+
+    def hasPrefix(self, prefix):
+        """Returns True if some word in the lexicon starts with prefix."""
+        return self.child(Lexicon.ROOT, prefix.upper()) >= 0
+
+    def iterCompletions(self, prefix=""):
+        """
+        Yields every word in the lexicon that starts with prefix
+        (including prefix itself), in alphabetical order.
+        """
+        prefix = prefix.upper()
+        node = self.child(Lexicon.ROOT, prefix)
+        if node < 0:
+            return
+        nodes = self._nodes
+        stack = [(node, prefix)]
+        while stack:
+            node, word = stack.pop()
+            mask = nodes[node]
+            if mask & WORD:
+                yield word
+            children = []
+            child = nodes[node + 1]
+            for i in range(26):
+                if mask & (1 << i):
+                    children.append((child, word + chr(65 + i)))
+                    child += 2
+            # push in reverse so the smallest letter is popped first
+            stack.extend(reversed(children))
+
+    def __contains__(self, word):
+        return self.contains(word)
+
+    def __iter__(self):
+        return self.iterCompletions()
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return "Lexicon({} words, {} nodes)".format(self._size, len(self._nodes) // 2)
+
+
+def compiledNameFor(lexiconName):
+    """Returns the default compiled file name for a text lexicon."""
+    return os.path.splitext(lexiconName)[0] + ".lex"
+
+def compileLexicon(lexiconName='bogwords.txt', compiledName=None):
+    """
+    Compile the text lexicon lexiconName into a binary file that
+    Lexicon.fromCompiled() can memory-map, and return the new Lexicon.
+    The file is written under a temporary name and then renamed, so
+    a concurrent reader never sees a partial file.
+    """
+    if compiledName is None:
+        compiledName = compiledNameFor(lexiconName)
+    lexicon = Lexicon.fromFile(lexiconName)
+    nodes = lexicon.getNodes()
+    tmpName = "{}.{}.tmp".format(compiledName, os.getpid())
+    with open(tmpName, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, sys.byteorder == "big",
+                             nodes.itemsize, len(nodes), len(lexicon)))
+        f.write(nodes)
+        f.write(lexicon.getCounts())
+    os.replace(tmpName, compiledName)
+    return lexicon
+
+def loadLexicon(lexiconName='bogwords.txt', compiledName=None):
+    """
+    Returns the Lexicon for the text file lexiconName, memory-mapped from
+    its compiled form.  The compiled file is (re)built first if it is
+    missing, unreadable, or older than the text file.  If it cannot be
+    written (eg a read-only directory) the text file is parsed instead.
+    """
+    if compiledName is None:
+        compiledName = compiledNameFor(lexiconName)
+    try:
+        if os.stat(compiledName).st_mtime_ns >= os.stat(lexiconName).st_mtime_ns:
+            return Lexicon.fromCompiled(compiledName)
+    except (OSError, ValueError, struct.error):
+        pass
+    try:
+        compileLexicon(lexiconName, compiledName)
+    except OSError:
+        return Lexicon.fromFile(lexiconName)
+    return Lexicon.fromCompiled(compiledName)
+
+
+class LexiconRegistry:
+    """A LexiconRegistry hands out one shared Lexicon per word file, so
+    that every game in a process uses the same (immutable) copy.
+    Entries are keyed by absolute path and remember the file's
+    modification time; a lookup after the file has changed evicts the
+    old entry and loads the new contents.
+
+    >>> registry = LexiconRegistry()
+    >>> registry.get('bogwords.txt') is registry.get('./bogwords.txt')
+    True
+    >>> registry.getStats()
+    {'hits': 1, 'misses': 1, 'evictions': 0, 'entries': 1}
+    """
+
+    __slots__ = ['_entries', '_hits', '_misses', '_evictions', '_lock']
+
+    def __init__(self):
+        self._entries = {}  # absolute path -> (mtime in ns, Lexicon)
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, lexiconName='bogwords.txt'):
+        """
+        Returns the shared Lexicon for the word file lexiconName, loading
+        it (via loadLexicon) if it is not cached or the file has changed.
+        """
+        path = os.path.abspath(lexiconName)
+        with self._lock:
+            entry = self._entries.get(path)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                if entry is not None:
+                    del self._entries[path]
+                    self._evictions += 1
+                raise
+            if entry is not None:
+                if entry[0] == mtime:
+                    self._hits += 1
+                    return entry[1]
+                self._evictions += 1
+            self._misses += 1
+            lexicon = loadLexicon(path)
+            self._entries[path] = (mtime, lexicon)
+            return lexicon
+
+    def getStats(self):
+        """Returns a dict of hit, miss and eviction counts."""
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses,
+                    "evictions": self._evictions, "entries": len(self._entries)}
+
+    def clear(self):
+        """Forget every cached Lexicon (counts are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+# the registry shared by everything in this process
+_registry = LexiconRegistry()
+
+def getLexicon(lexiconName='bogwords.txt'):
+    """Returns the process-wide shared Lexicon for lexiconName."""
+    return _registry.get(lexiconName)
+
+def getLexiconStats():
+    """Returns the hit/miss/eviction counts of the shared registry."""
+    return _registry.getStats()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # build step: python lexicon.py bogwords.txt [bogwords.lex]
+        print(compileLexicon(*sys.argv[1:3]))
+    else:
+        from doctest import testmod
+        testmod()
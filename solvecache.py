@@ -0,0 +1,246 @@
+"""
+A cache of solved boards that knows about symmetry.
+
+Rotating or reflecting a board moves its letters around but keeps the
+same paths, so all its variants (8 for a square board, 4 otherwise)
+have the same words.  SolveCache files each board under the key of its
+canonical variant, the one whose text form (bogglecubes.formatFaces)
+sorts first, so solving any variant of a board that has been seen
+before is a lookup.
+
+Usage:
+    python solvecache.py boards.bin [--cache cache.json] [--size N]
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+import sys
+from collections import OrderedDict
+
+from bitsolver import BitSolver
+from boardio import readBoards
+from boggleengine import scoreWords
+from bogglecubes import formatFaces
+
+_VERSION = 1
+
+def symmetries(rows, cols):
+    """
+    Returns the cell permutations that rotate or reflect a rows x cols
+    board: board[perm[i]] is cell i of the variant.  The identity is first.
+
+    >>> len(symmetries(4, 4)), len(symmetries(2, 3))
+    (8, 4)
+    >>> sorted(symmetries(2, 2))
+    [(0, 1, 2, 3), (0, 2, 1, 3), (1, 0, 3, 2), (1, 3, 0, 2), (2, 0, 3, 1), (2, 3, 0, 1), (3, 1, 2, 0), (3, 2, 1, 0)]
+    """
+    perms = []
+    # transposing only keeps the shape of square boards
+    for transpose in ((False, True) if rows == cols else (False,)):
+        for flipRows in (False, True):
+            for flipCols in (False, True):
+                perm = []
+                for row in range(rows):
+                    for col in range(cols):
+                        r = rows - 1 - row if flipRows else row
+                        c = cols - 1 - col if flipCols else col
+                        perm.append(c * cols + r if transpose else r * cols + c)
+                perms.append(tuple(perm))
+    return perms
+
+def canonicalKey(faces, perms):
+    """
+    Returns the text form of the variant of faces (list of str) that
+    sorts first, among those made by perms (from symmetries).
+
+    >>> perms = symmetries(2, 2)
+    >>> canonicalKey(["C", "A", "T", "S"], perms) == canonicalKey(["T", "C", "S", "A"], perms)
+    True
+    """
+    return min(formatFaces([faces[i] for i in perm]) for perm in perms)
+
+def lexiconFingerprint(lexicon):
+    """Returns a short hex digest identifying lexicon's contents."""
+    return hashlib.sha1(lexicon.getNodes()).hexdigest()[:16]
+
+
+class SolveCache:
+    """A SolveCache solves boards with a BitSolver and remembers the
+    words and score of the most recently used maxSize boards, filed
+    under their canonical keys.
+
+    >>> cache = SolveCache(BitSolver(2, 2), maxSize=2)
+    >>> cache.solve(["C", "A", "T", "S"])
+    (('ACT', 'CAST', 'CAT', 'SAC', 'SAT', 'SCAT'), 6)
+    >>> cache.solve(["T", "C", "S", "A"])[1]   # a rotation: a hit
+    6
+    >>> cache.solve(["D", "O", "G", "S"])[1], cache.solve(["Z", "Z", "Z", "Z"])[1]
+    (3, 0)
+    >>> cache.getStats()
+    {'hits': 1, 'misses': 3, 'evictions': 1, 'entries': 2, 'hitRate': 0.25}
+    """
+
+    __slots__ = ['_solver', '_perms', '_entries', '_maxSize', '_fileName',
+                 '_hits', '_misses', '_evictions']
+
+    def __init__(self, solver=None, maxSize=100000, fileName=None):
+        """
+        Create a cache in front of solver (default: a 4x4 BitSolver on
+        the shared lexicon) holding at most maxSize boards.  If fileName
+        names a cache saved earlier for the same board size and lexicon,
+        its boards are loaded; save() writes the cache back there.
+        """
+        self._solver = solver if solver is not None else BitSolver()
+        self._perms = symmetries(self._solver.getRows(), self._solver.getCols())
+        self._entries = OrderedDict()   # key -> (words, score), oldest first
+        self._maxSize = maxSize
+        self._fileName = fileName
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        if fileName is not None and os.path.exists(fileName):
+            self.load(fileName)
+
+    def getSolver(self):
+        return self._solver
+
+    def getMaxSize(self):
+        return self._maxSize
+
+    def solve(self, faces):
+        """
+        Returns (words, score) for the board whose faces (list of str,
+        row by row) are given; words is a sorted tuple.
+        """
+        key = canonicalKey(faces, self._perms)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return entry
+        self._misses += 1
+        words = tuple(self._solver.solve(faces))
+        entry = (words, scoreWords(words))
+        self._store(key, entry)
+        return entry
+
+    def _store(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxSize:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def getStats(self):
+        """Returns a dict of hit, miss and eviction counts and hit rate."""
+        lookups = self._hits + self._misses
+        return {"hits": self._hits, "misses": self._misses,
+                "evictions": self._evictions, "entries": len(self._entries),
+                "hitRate": self._hits / lookups if lookups else 0.0}
+
+    def clear(self):
+        """Forget every cached board (counts are kept)."""
+        self._entries.clear()
+
+    def _header(self):
+        return {"version": _VERSION, "rows": self._solver.getRows(),
+                "cols": self._solver.getCols(),
+                "lexicon": lexiconFingerprint(self._solver.getLexicon())}
+
+    def save(self, fileName=None):
+        """
+        Write the cached boards as JSON to fileName (default: the file
+        given when the cache was created).  The file is replaced in one
+        step, so an interrupted save leaves the old cache intact.
+        """
+        fileName = fileName or self._fileName
+        data = self._header()
+        data["entries"] = [[key, " ".join(words), score]
+                           for key, (words, score) in self._entries.items()]
+        tmpName = "{}.{}.tmp".format(fileName, os.getpid())
+        with open(tmpName, "w") as f:
+            json.dump(data, f)
+        os.replace(tmpName, fileName)
+
+    def load(self, fileName):
+        """
+        Add the boards cached in fileName.  A file saved for another
+        board size or lexicon, or that is not a well-formed cache, is
+        ignored.  Returns the number of boards loaded.
+
+        >>> import os, tempfile
+        >>> fileName = os.path.join(tempfile.mkdtemp(), "cache.json")
+        >>> cache = SolveCache(BitSolver(2, 2))
+        >>> cache.solve(["C", "A", "T", "S"])[1]
+        6
+        >>> cache.save(fileName); SolveCache(BitSolver(2, 2)).load(fileName)
+        1
+        >>> header = cache._header()
+        >>> for data in [[1, 2], dict(header, entries=5), dict(header, entries=[["CATS", "CAT"]])]:
+        ...     with open(fileName, "w") as f:
+        ...         json.dump(data, f)
+        ...     print(SolveCache(BitSolver(2, 2)).load(fileName))
+        0
+        0
+        0
+        """
+        try:
+            with open(fileName) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if not isinstance(data, dict):
+            return 0
+        if any(data.get(name) != value for name, value in self._header().items()):
+            return 0
+        # check every entry before storing any, so a damaged file adds nothing
+        entries = []
+        try:
+            for key, words, score in data.get("entries", ()):
+                if not (isinstance(key, str) and isinstance(words, str) and isinstance(score, int)):
+                    return 0
+                entries.append((key, (tuple(words.split()), score)))
+        except (TypeError, ValueError):
+            return 0
+        for key, entry in entries:
+            self._store(key, entry)
+        return len(entries)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Solve boards through a symmetry-aware cache.")
+    parser.add_argument("boards", help="board file, text or binary")
+    parser.add_argument("--cache", help="load the cache from, and save it to, this JSON file")
+    parser.add_argument("--size", type=int, default=100000, help="most boards to keep (default 100000)")
+    parser.add_argument("-o", "--output", help="write words and scores here")
+    options = parser.parse_args(args)
+
+    boards = readBoards(options.boards)
+    first = next(boards, None)
+    if first is None:
+        return
+    side = math.isqrt(len(first))
+    cache = SolveCache(BitSolver(side, len(first) // side), options.size, options.cache)
+    out = open(options.output, "w") if options.output else None
+    for faces in itertools.chain([first], boards):
+        words, score = cache.solve(faces)
+        if out is not None:
+            out.write("{}\t{}\t{}\n".format(formatFaces(faces), score, " ".join(words)))
+    if out is not None:
+        out.close()
+    if options.cache:
+        cache.save()
+    print(", ".join("{} {}".format(name, round(value, 3)) for name, value in cache.getStats().items()),
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main()
+    else:
+        from doctest import testmod
+        testmod()
@@ -0,0 +1,98 @@
+"""
+Reports the cold-start cost of the Boggle game: how long a fresh Python
+process takes to import bogglegame, with and without opening a window.
+
+Each scenario runs in new interpreters several times and the median is
+reported.  "import + Tk root" forces the Tk root to be created, which is
+what every import used to cost before the root was made lazily.
+Scenarios that need a display are reported as unavailable without one.
+
+Usage:
+    python startupreport.py [runs]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# each snippet prints the seconds spent inside the interpreter
+_SCENARIOS = [
+    ("import bogglegame", None, """
+import time; start = time.perf_counter()
+import bogglegame
+print(time.perf_counter() - start)
+"""),
+    ("import + Tk root (old eager cost)", "tk", """
+import time; start = time.perf_counter()
+import bogglegame, graphics
+graphics._getRoot()
+print(time.perf_counter() - start)
+"""),
+    ("import + window + game (tk)", "tk", """
+import time; start = time.perf_counter()
+from bogglegame import BoggleGame
+from graphics import GraphWin
+win = GraphWin("Boggle", 400, 400)
+game = BoggleGame(win)
+print(time.perf_counter() - start)
+game.close()
+win.close()
+"""),
+    ("import + window + game (null)", "null", """
+import time; start = time.perf_counter()
+from bogglegame import BoggleGame
+from graphics import GraphWin
+game = BoggleGame(GraphWin("Boggle", 400, 400))
+print(time.perf_counter() - start)
+game.close()
+"""),
+]
+
+def _run(code, backend):
+    """Runs code in a fresh interpreter; returns (inside, wall) seconds
+    or None if it failed (eg no display)."""
+    env = dict(os.environ)
+    if backend is not None:
+        env["GRAPHICS_BACKEND"] = backend
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], env=env,
+                            capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.split()[0]), wall
+
+def _slowestImports(count=5):
+    """Returns the count modules with the largest cumulative import time
+    when importing bogglegame, as (microseconds, module) pairs."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import bogglegame"],
+                            capture_output=True, text=True)
+    times = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            times.append((int(parts[1]), parts[2].strip()))
+    return sorted(times, reverse=True)[:count]
+
+def report(runs=5):
+    """Returns the startup report as a string."""
+    lines = ["{:36s} {:>12s} {:>12s}".format("scenario", "in-process", "process")]
+    for name, backend, code in _SCENARIOS:
+        samples = [_run(code, backend) for _ in range(runs)]
+        if None in samples:
+            lines.append("{:36s} {:>25s}".format(name, "unavailable"))
+            continue
+        inside = statistics.median(s[0] for s in samples)
+        wall = statistics.median(s[1] for s in samples)
+        lines.append("{:36s} {:10.1f}ms {:10.1f}ms".format(name, 1000 * inside, 1000 * wall))
+    lines.append("")
+    lines.append("slowest imports under bogglegame (cumulative):")
+    for micros, module in _slowestImports():
+        lines.append("  {:8.1f}ms  {}".format(micros / 1000, module))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    print(report(int(sys.argv[1]) if len(sys.argv) > 1 else 5))